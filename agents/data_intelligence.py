@@ -1,70 +1,114 @@
-import pandas as pd
-import numpy as np
 import json
-from google import genai
-from google.genai import types
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from utils.column_profiler import DatasetProfile, semantic_column_types
+from utils.domain_packs import DomainPackRegistry
+from utils.llm_gateway import get_gateway
 
 class DataIntelligenceAgent:
     """Agent 1: Analyzes CSV data structure and identifies business domain"""
     
-    def __init__(self, api_key):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key, domain_cache=None, domain_timeout=20.0, domain_packs=None, rule_confidence=0.6, llm=None):
+        self.llm = llm or get_gateway(api_key)  # Shared LLMGateway
+        self.domain_cache = domain_cache  # Optional DomainCache; skips the LLM call for known schemas
+        self.domain_timeout = domain_timeout  # Seconds to wait for the model before using the rule-based domain
         
-    def analyze_data(self, df):
-        """Comprehensive data analysis including domain detection"""
+        # Keyword packs drive the rule-based domain, and settle well-known schemas without the model
+        self.domain_packs = domain_packs or DomainPackRegistry()
+        self.rule_confidence = rule_confidence
+        
+        # Domain calls run here so local profiling overlaps the network wait
+        self._domain_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='domain')
+        
+    def analyze_data(self, df, provisional=False, profile=None, domain_info=None):
+        """Comprehensive data analysis including domain detection
+        
+        provisional marks results computed on a preview sample while the full data is still loading.
+        profile is a DatasetProfile already holding df, or an empty one to fill (a new one when
+        not given); the frame is profiled once.
+        domain_info is a domain result to keep instead of detecting the domain again.
+        """
+        
+        if profile is None:
+            profile = DatasetProfile()
+        
+        # Domain detection needs only the column types, which dtypes and distinct counts settle,
+        # so the model call is in flight while the full profile pass runs
+        if domain_info is None:
+            domain_types = self._analyze_columns(profile) if profile.rows else semantic_column_types(df)
+            domain_future = self._domain_pool.submit(self._detect_business_domain, df, domain_types)
+            domain_deadline = time.monotonic() + self.domain_timeout
+        
+        # One pass per column; every section below is derived from this profile
+        if not profile.rows:
+            profile.update(df)
         
         # Basic statistics
         basic_stats = {
-            'rows': len(df),
-            'columns': len(df.columns),
-            'memory_usage': df.memory_usage(deep=True).sum(),
-            'missing_values': df.isnull().sum().sum()
+            'rows': profile.rows,
+            'columns': len(profile.columns),
+            'memory_usage': profile.memory_bytes,
+            'missing_values': profile.missing_values
         }
         
         # Column analysis
-        column_analysis = self._analyze_columns(df)
+        column_analysis = self._analyze_columns(profile)
         
-        # Domain detection
-        domain_info = self._detect_business_domain(df, column_analysis)
+        # The data quality assessment also runs alongside the domain call
+        quality_assessment = self._assess_data_quality(df, profile)
         
-        # Data quality assessment
-        quality_assessment = self._assess_data_quality(df)
+        if domain_info is None:
+            try:
+                domain_info = domain_future.result(timeout=max(domain_deadline - time.monotonic(), 0))
+            except TimeoutError:
+                # The call keeps running in the background and still fills the domain cache when it returns
+                print(f"AI domain detection timed out after {self.domain_timeout}s")
+                domain_info = self._fallback_domain_detection(df)
         
         return {
             'basic_stats': basic_stats,
             'column_analysis': column_analysis,
+            'column_profile': profile.to_dict(),
             'domain': domain_info,
             'quality': quality_assessment,
-            'sample_data': df.head(3).to_dict('records')
+            'sample_data': df.head(3).to_dict('records'),
+            'provisional': provisional,
+            'fingerprint': profile.fingerprint()
         }
     
-    def _analyze_columns(self, df):
-        """Analyze column types and characteristics"""
-        analysis = {
-            'numeric': [],
-            'categorical': [],
-            'datetime': [],
-            'boolean': [],
-            'text': []
-        }
+    def update_analysis(self, df, appended_rows, profile, previous, provisional=False):
+        """Refresh analysis results after appended_rows rows were added to the end of df
         
-        for col in df.columns:
-            dtype = df[col].dtype
-            unique_count = df[col].nunique()
-            total_count = len(df[col])
-            
-            if pd.api.types.is_numeric_dtype(dtype):
-                analysis['numeric'].append(col)
-            elif pd.api.types.is_datetime64_any_dtype(dtype):
-                analysis['datetime'].append(col)
-            elif pd.api.types.is_bool_dtype(dtype):
-                analysis['boolean'].append(col)
-            elif unique_count / total_count < 0.5 and unique_count < 50:
-                analysis['categorical'].append(col)
-            else:
-                analysis['text'].append(col)
+        profile holds the running aggregates of the rows analysed before and is updated in
+        place from the new rows only. The domain is detected again only when the schema
+        (column names or column types) changed; otherwise the previous result is kept.
+        """
+        
+        new_rows = df.iloc[len(df) - appended_rows:]
+        if profile.matches(new_rows) and profile.rows == len(df) - appended_rows:
+            profile.update(new_rows)
+        else:
+            # Columns or dtypes drifted: the stored aggregates no longer apply
+            profile.reset().update(df)
+        
+        same_schema = self._analyze_columns(profile) == previous.get('column_analysis')
+        return self.analyze_data(df, provisional, profile=profile,
+                                 domain_info=previous.get('domain') if same_schema else None)
+    
+    def reanalyze(self, df, previous, profile=None, provisional=False):
+        """Analysis of df replacing previous, e.g. when the full data replaces a preview sample
         
-        return analysis
+        The frame is profiled again, but the detected domain is kept when the column types
+        did not change, so no new model call is made for the same schema.
+        """
+        
+        same_schema = semantic_column_types(df) == previous.get('column_analysis')
+        return self.analyze_data(df, provisional, profile=profile,
+                                 domain_info=previous.get('domain') if same_schema else None)
+    
+    def _analyze_columns(self, profile):
+        """Analyze column types and characteristics"""
+        return profile.columns_by_type()
     
     def _detect_business_domain(self, df, column_analysis):
         """Use AI to detect business domain based on column names and data patterns"""
@@ -82,6 +126,18 @@ class DataIntelligenceAgent:
             sample_values = df[col].dropna().head(3).tolist()
             column_info['sample_values'][col] = [str(val) for val in sample_values]
         
+        cache_key = None
+        if self.domain_cache is not None:
+            cache_key = self.domain_cache.make_key(df.columns, column_analysis, column_info['sample_values'])
+            cached = self.domain_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # Skip the model when the keyword packs clearly recognise the schema
+        rule_domain, margin = self.domain_packs.rank(df.columns, column_info['sample_values'])
+        if rule_domain['confidence'] >= self.rule_confidence and margin >= 0.5:
+            return rule_domain
+        
         prompt = f"""
         Analyze the following dataset structure and identify the most likely business domain:
         
@@ -106,64 +162,32 @@ class DataIntelligenceAgent:
         """
         
         try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json"
-                )
-            )
+            response_text = self.llm.generate(prompt, json_output=True)
             
-            if response.text:
-                domain_data = json.loads(response.text)
+            if response_text:
+                domain_data = json.loads(response_text)
+                if cache_key is not None:
+                    self.domain_cache.put(cache_key, domain_data)
                 return domain_data
             else:
-                return self._fallback_domain_detection(df)
+                return rule_domain
                 
         except Exception as e:
             print(f"AI domain detection failed: {e}")
-            return self._fallback_domain_detection(df)
+            return rule_domain
     
-    def _fallback_domain_detection(self, df):
+    def _fallback_domain_detection(self, df, sample_values=None):
         """Fallback domain detection using rule-based approach"""
-        columns_lower = [col.lower() for col in df.columns]
-        
-        # E-commerce indicators
-        ecommerce_keywords = ['price', 'product', 'order', 'customer', 'sales', 'revenue', 'quantity', 'sku']
-        ecommerce_score = sum(1 for keyword in ecommerce_keywords if any(keyword in col for col in columns_lower))
-        
-        # SaaS indicators
-        saas_keywords = ['user', 'subscription', 'plan', 'trial', 'churn', 'mrr', 'arr', 'feature']
-        saas_score = sum(1 for keyword in saas_keywords if any(keyword in col for col in columns_lower))
-        
-        # Restaurant indicators
-        restaurant_keywords = ['menu', 'table', 'order', 'food', 'dish', 'rating', 'reservation']
-        restaurant_score = sum(1 for keyword in restaurant_keywords if any(keyword in col for col in columns_lower))
-        
-        scores = {
-            'e-commerce': ecommerce_score,
-            'saas': saas_score,
-            'restaurant': restaurant_score
-        }
-        
-        best_domain = max(scores.keys(), key=lambda k: scores[k])
-        confidence = min(scores[best_domain] / len(columns_lower), 1.0)
-        
-        return {
-            'type': best_domain if confidence > 0.2 else 'general',
-            'confidence': confidence,
-            'indicators': [f"Found {scores[best_domain]} relevant column indicators"],
-            'suggested_insights': ["Revenue analysis", "Customer behavior patterns", "Performance metrics"]
-        }
+        return self.domain_packs.detect(df.columns, sample_values)
     
-    def _assess_data_quality(self, df):
+    def _assess_data_quality(self, df, profile):
         """Assess data quality metrics"""
-        total_cells = df.size
-        missing_cells = df.isnull().sum().sum()
+        total_cells = profile.rows * len(profile.columns)
+        missing_cells = profile.missing_values
         
         return {
-            'completeness': 1 - (missing_cells / total_cells),
-            'missing_values_by_column': df.isnull().sum().to_dict(),
-            'duplicate_rows': df.duplicated().sum(),
+            'completeness': 1 - (missing_cells / total_cells) if total_cells else 1.0,
+            'missing_values_by_column': {col: column.null_count for col, column in profile.columns.items()},
+            'duplicate_rows': profile.duplicate_rows(df),
             'data_types_consistent': True  # Simplified for now
         }
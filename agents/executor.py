@@ -1,35 +1,72 @@
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from google import genai
-from google.genai import types
 from utils.chart_generator import ChartGenerator
+from utils.prompt_context import PromptContext
+from utils.llm_gateway import get_gateway
 
 class ExecutorAgent:
     """Executor Agent: Handles chat functionality and dashboard generation"""
     
-    def __init__(self, api_key):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key, answer_cache=None, llm=None, chart_timeout=30.0, chart_workers=4):
+        self.llm = llm or get_gateway(api_key)  # Shared LLMGateway
         self.chart_generator = ChartGenerator()
+        self.chart_timeout = chart_timeout  # Seconds a dashboard waits for a chart before showing an error in its place
+        self._chart_pool = ThreadPoolExecutor(max_workers=chart_workers, thread_name_prefix='chart')
+        self.answer_cache = answer_cache  # Optional AnswerCache shared by everyone asking about the same data
+        self._prompt_context = None
     
-    def chat_with_data(self, question, df, analysis_results):
-        """Handle data-related questions using Gemini"""
+    def get_prompt_context(self, df, analysis_results, prompt_context=None):
+        """Prompt context for the current dataset, reused until the data or its analysis changes
+        
+        prompt_context is a context the caller kept itself (e.g. in Streamlit session state).
+        """
+        for context in (prompt_context, self._prompt_context):
+            if context is not None and context.matches(df, analysis_results):
+                return context
+        
+        self._prompt_context = PromptContext(df, analysis_results)
+        return self._prompt_context
+    
+    def _chat_prompt(self, question, df, analysis_results, prompt_context=None):
+        """Build the chat prompt for a question, and its exact answer when it can be computed locally
+        
+        Plain aggregate questions ('total revenue by region') are run on the dataframe by the
+        query engine; the model is then only asked to phrase that result, and the plain-text
+        result is returned as the answer if the model fails.
+        """
         
         # Prepare context about the data
-        domain_info = analysis_results.get('domain', {})
-        column_analysis = analysis_results.get('column_analysis', {})
+        context = self.get_prompt_context(df, analysis_results, prompt_context)
+        domain_info = context.domain
+        data_context = context.text
         
-        data_context = f"""
-        Dataset Context:
-        - Business Domain: {domain_info.get('type', 'general')} (confidence: {domain_info.get('confidence', 0.5):.2f})
-        - Shape: {len(df)} rows × {len(df.columns)} columns
-        - Columns: {list(df.columns)}
-        - Numeric Columns: {column_analysis.get('numeric', [])}
-        - Categorical Columns: {column_analysis.get('categorical', [])}
-        - Sample Data (first 3 rows): {df.head(3).to_dict('records')}
-        - Basic Statistics: {df.describe().to_dict() if len(column_analysis.get('numeric', [])) > 0 else 'No numeric columns for statistics'}
+        local = self._local_answer(question, df, context)
+        if local is not None:
+            plan, result = local
+            engine = context.query_engine()
+            exact_answer = engine.format_result(plan, result)
+            
+            prompt = f"""
+        You are a business data analyst expert. The user asked a question about their {domain_info.get('type', 'business')} data, and it has already been answered exactly from the full dataset.
+        
+        User Question: {question}
+        
+        Computation: {plan.describe()}
+        Result:
+        {exact_answer}
+        
+        Write a short, conversational answer to the question using exactly these numbers. Do not recompute, estimate or change any value, and do not add figures that are not in the result. You may add one sentence of business interpretation.
         """
+            return prompt, exact_answer
+        
+        # Rows for the customers, products or categories the question names
+        retrieved = context.retrieve(question)
+        if retrieved:
+            data_context += "\n" + retrieved
         
         prompt = f"""
         You are a business data analyst expert. Answer the user's question about their {domain_info.get('type', 'business')} data.
@@ -48,27 +85,114 @@ class ExecutorAgent:
         Be conversational but professional, and focus on practical business value.
         """
         
+        return prompt, None
+    
+    def _local_answer(self, question, df, context):
+        """(plan, result) if the query engine understands the question, else None"""
+        
         try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=prompt
-            )
+            engine = context.query_engine()
+            plan = engine.parse(question) if engine is not None else None
+            if plan is None:
+                return None
+            return plan, engine.execute(df, plan)
+        except Exception as e:
+            print(f"Local query failed, falling back to the model: {str(e)}")
+            return None
+    
+    def cached_answer(self, question, df, analysis_results, prompt_context=None):
+        """Earlier answer to the same question about the same data, or None"""
+        
+        if self.answer_cache is None:
+            return None
+        context = self.get_prompt_context(df, analysis_results, prompt_context)
+        return self.answer_cache.get(context.fingerprint, question)
+    
+    def _cache_answer(self, question, df, analysis_results, prompt_context, answer):
+        if self.answer_cache is not None:
+            context = self.get_prompt_context(df, analysis_results, prompt_context)
+            self.answer_cache.put(context.fingerprint, question, answer)
+    
+    def chat_with_data(self, question, df, analysis_results, prompt_context=None, check_cache=True):
+        """Handle data-related questions using Gemini
+        
+        check_cache=False skips the answer cache lookup for callers that already made it;
+        new answers are stored either way.
+        """
+        
+        cached = self.cached_answer(question, df, analysis_results, prompt_context) if check_cache else None
+        if cached is not None:
+            return cached
+        
+        prompt, exact_answer = self._chat_prompt(question, df, analysis_results, prompt_context)
+        
+        try:
+            response_text = self.llm.generate(prompt)
             
-            if response.text:
-                return response.text
+            if response_text:
+                self._cache_answer(question, df, analysis_results, prompt_context, response_text)
+                return response_text
+            elif exact_answer:
+                return exact_answer
             else:
                 return "I apologize, but I couldn't generate a response to your question. Please try rephrasing or asking a different question about your data."
-                
+        
         except Exception as e:
+            if exact_answer:
+                return exact_answer
             return f"I encountered an error while analyzing your data: {str(e)}. Please try asking your question in a different way."
     
+    def stream_chat_with_data(self, question, df, analysis_results, prompt_context=None, check_cache=True):
+        """Like chat_with_data, but yields the answer in pieces as the model generates them"""
+        
+        cached = self.cached_answer(question, df, analysis_results, prompt_context) if check_cache else None
+        if cached is not None:
+            yield cached
+            return
+        
+        prompt, exact_answer = self._chat_prompt(question, df, analysis_results, prompt_context)
+        
+        pieces = []
+        try:
+            for text in self.llm.generate_stream(prompt):
+                pieces.append(text)
+                yield text
+            
+            if pieces:
+                self._cache_answer(question, df, analysis_results, prompt_context, ''.join(pieces))
+            else:
+                yield exact_answer or "I apologize, but I couldn't generate a response to your question. Please try rephrasing or asking a different question about your data."
+        
+        except Exception as e:
+            if exact_answer and not pieces:
+                yield exact_answer
+            else:
+                yield f"I encountered an error while analyzing your data: {str(e)}. Please try asking your question in a different way."
+    
     def generate_dashboard(self, df, selected_charts):
-        """Generate interactive dashboard with selected charts"""
+        """Generate interactive dashboard with selected charts
+        
+        Charts are built concurrently on the chart pool and returned in the order they were
+        selected. A chart not finished within chart_timeout of the dashboard starting is
+        replaced by an error chart; if it is still running it finishes in the background.
+        """
         charts = []
         
-        for chart_config in selected_charts:
+        futures = [self._chart_pool.submit(self.chart_generator.create_chart, df, chart_config)
+                   for chart_config in selected_charts]
+        deadline = time.monotonic() + self.chart_timeout
+        
+        for chart_config, future in zip(selected_charts, futures):
             try:
-                figure = self.chart_generator.create_chart(df, chart_config)
+                try:
+                    figure = future.result(timeout=max(deadline - time.monotonic(), 0))
+                except TimeoutError:
+                    future.cancel()
+                    print(f"Chart {chart_config['title']} timed out after {self.chart_timeout}s")
+                    figure = self.chart_generator._create_error_chart(
+                        chart_config['title'],
+                        f"Chart took longer than {self.chart_timeout:g}s to build"
+                    )
                 if figure:
                     charts.append({
                         'title': chart_config['title'],
@@ -118,21 +242,15 @@ class ExecutorAgent:
         """
         
         try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json"
-                )
-            )
+            response_text = self.llm.generate(prompt, json_output=True)
             
-            if response.text:
-                chart_config = json.loads(response.text)
+            if response_text:
+                chart_config = json.loads(response_text)
                 figure = self.chart_generator.create_chart(df, chart_config)
                 return figure
             else:
                 return None
-                
+        
         except Exception as e:
             print(f"Custom visualization creation failed: {e}")
             return None
@@ -1,12 +1,11 @@
 import json
-from google import genai
-from google.genai import types
+from utils.llm_gateway import get_gateway
 
 class VisualizationAgent:
     """Agent 2: Suggests domain-specific visualizations using AI"""
     
-    def __init__(self, api_key):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key, llm=None):
+        self.llm = llm or get_gateway(api_key)  # Shared LLMGateway
     
     def suggest_visualizations(self, df, analysis_results):
         """Generate 6-7 domain-specific visualization suggestions"""
@@ -68,25 +67,24 @@ class VisualizationAgent:
         """
         
         try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json"
-                )
-            )
+            response_text = self.llm.generate(prompt, json_output=True)
             
-            if response.text:
-                suggestions = json.loads(response.text)
+            if response_text:
+                suggestions = json.loads(response_text)
                 # Validate suggestions against actual columns
-                validated_suggestions = self._validate_suggestions(suggestions, df.columns)
-                return validated_suggestions
+                suggestions = self._validate_suggestions(suggestions, df.columns)
             else:
-                return self._fallback_suggestions(df, analysis_results)
+                suggestions = self._fallback_suggestions(df, analysis_results)
                 
         except Exception as e:
             print(f"AI visualization suggestions failed: {e}")
-            return self._fallback_suggestions(df, analysis_results)
+            suggestions = self._fallback_suggestions(df, analysis_results)
+        
+        # Suggestions built on a preview sample are provisional until the full data is loaded
+        for suggestion in suggestions:
+            suggestion['provisional'] = analysis_results.get('provisional', False)
+        
+        return suggestions
     
     def _validate_suggestions(self, suggestions, available_columns):
         """Validate that suggested columns exist in the dataset"""
@@ -7,6 +7,14 @@ from agents.visualization import VisualizationAgent
 from agents.executor import ExecutorAgent
 from agents.memory import MemoryAgent
 from utils.csv_processor import CSVProcessor
+from utils.parse_cache import ParseCache
+from utils.domain_cache import DomainCache
+from utils.answer_cache import AnswerCache
+from utils.prompt_context import PromptContext
+from utils.sampled_loader import SampledLoad
+
+# Uploads above this size start with a preview sample while the full file loads in the background
+PREVIEW_THRESHOLD_BYTES = 50 * 1024 * 1024
 
 # Set page config
 st.set_page_config(
@@ -79,6 +87,8 @@ if 'csv_data' not in st.session_state:
     st.session_state.csv_data = None
 if 'analysis_results' not in st.session_state:
     st.session_state.analysis_results = None
+if 'prompt_context' not in st.session_state:
+    st.session_state.prompt_context = None
 if 'selected_task' not in st.session_state:
     st.session_state.selected_task = None
 if 'visualization_suggestions' not in st.session_state:
@@ -87,6 +97,18 @@ if 'selected_charts' not in st.session_state:
     st.session_state.selected_charts = []
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
+if 'loader' not in st.session_state:
+    st.session_state.loader = None
+    st.session_state.loader_file_id = None
+
+@st.cache_resource
+def load_agents(api_key):
+    """Agents shared by every session and rerun; they all call the model through one LLM gateway"""
+    data_agent = DataIntelligenceAgent(api_key, domain_cache=DomainCache(os.getenv('DOMAIN_CACHE_PATH')))
+    planner_agent = PlannerAgent()
+    viz_agent = VisualizationAgent(api_key)
+    executor_agent = ExecutorAgent(api_key, answer_cache=AnswerCache())
+    return data_agent, planner_agent, viz_agent, executor_agent
 
 def main():
     # Header with Tailwind
@@ -103,11 +125,11 @@ def main():
         st.error("❌ Gemini API key not found. Please set the GEMINI_API_KEY environment variable.")
         return
     
-    # Initialize agents
-    data_agent = DataIntelligenceAgent(api_key)
-    planner_agent = PlannerAgent()
-    viz_agent = VisualizationAgent(api_key)
-    executor_agent = ExecutorAgent(api_key)
+    # Initialize agents once per process, not on every rerun
+    data_agent, planner_agent, viz_agent, executor_agent = load_agents(api_key)
+    
+    # Switch from a preview sample to the full data once its background load finishes
+    sync_full_data(data_agent)
     
     # Show workflow progress
     show_workflow_progress()
@@ -128,6 +150,30 @@ def main():
     # Sidebar
     show_modern_sidebar()
 
+def sync_full_data(data_agent):
+    """Replace the preview sample with the full dataframe when the background load is done"""
+    loader = st.session_state.loader
+    if loader is None or not loader.done or st.session_state.current_step == 'upload':
+        return
+    
+    if loader.error is None:
+        st.session_state.csv_data = loader.result()
+        
+        # Analysis of the sample is redone on the full data, keeping its domain if the schema matches
+        previous = st.session_state.analysis_results
+        if previous is not None:
+            with st.spinner("Updating the analysis with the full data..."):
+                analysis = data_agent.reanalyze(st.session_state.csv_data, previous)
+            st.session_state.analysis_results = analysis
+            st.session_state.prompt_context = PromptContext(st.session_state.csv_data, analysis)
+            st.session_state.memory.store_analysis(analysis)
+        
+        # Suggestions made on the sample are regenerated from the full data
+        suggestions = st.session_state.visualization_suggestions or []
+        if any(suggestion.get('provisional') for suggestion in suggestions):
+            st.session_state.visualization_suggestions = None
+    st.session_state.loader = None
+
 def show_workflow_progress():
     """Display modern workflow progress"""
     steps = [
@@ -211,10 +257,36 @@ def show_modern_upload_interface():
         if uploaded_file is not None:
             try:
                 with st.spinner("Processing your CSV file..."):
-                    processor = CSVProcessor()
-                    df = processor.load_csv(uploaded_file)
+                    processor = CSVProcessor(cache=ParseCache(os.getenv('PARSE_CACHE_DIR')))
+                    loader = st.session_state.loader
+                    
+                    if loader is not None and st.session_state.loader_file_id == uploaded_file.file_id:
+                        # Preview already running for this file (Streamlit reruns the script)
+                        df = loader.sample() if not loader.done else loader.result()
+                    elif uploaded_file.size > PREVIEW_THRESHOLD_BYTES:
+                        spool_path = processor.spool_upload(uploaded_file)
+                        loader = SampledLoad(processor, spool_path, remove_source=True).start()
+                        df = loader.wait_for_sample()
+                        st.session_state.loader = loader
+                        st.session_state.loader_file_id = uploaded_file.file_id
+                    else:
+                        spool_path = processor.spool_upload(uploaded_file)
+                        try:
+                            df = processor.load_csv(spool_path)
+                        finally:
+                            os.remove(spool_path)
+                        st.session_state.loader = None
                 
-                st.success(f"✅ Successfully loaded CSV with {len(df)} rows and {len(df.columns)} columns")
+                if st.session_state.loader is not None and not st.session_state.loader.done:
+                    st.success(f"✅ Preview ready: sampled {len(df)} rows while the full file keeps loading")
+                else:
+                    st.success(f"✅ Successfully loaded CSV with {len(df)} rows and {len(df.columns)} columns")
+                dialect = processor.load_info.get('dialect', {})
+                if dialect:
+                    st.caption(f"Detected encoding {dialect.get('encoding') or 'text'}, delimiter {dialect.get('delimiter')!r}, quote {dialect.get('quotechar')!r}")
+                memory = processor.load_info.get('memory')
+                if memory:
+                    st.caption(f"Memory optimized from {memory['before_bytes'] / 1024 ** 2:.1f} MB to {memory['after_bytes'] / 1024 ** 2:.1f} MB")
                 
                 # Show preview in an expander
                 with st.expander("📋 Preview Data", expanded=True):
@@ -232,13 +304,23 @@ def show_modern_upload_interface():
 def show_modern_analysis_interface(data_agent):
     st.header("🧠 Step 2: AI Data Analysis")
     
+    provisional = st.session_state.loader is not None
+    
+    if provisional:
+        st.info(f"⏳ Provisional results from a sample of {len(st.session_state.csv_data):,} rows; the full file is still loading.")
+        if st.button("🔄 Refresh with loaded data"):
+            st.rerun()
+    
     if st.session_state.csv_data is not None:
         with st.spinner("🤖 Agent 1 is analyzing your data..."):
             try:
                 # Perform data intelligence analysis
-                analysis = data_agent.analyze_data(st.session_state.csv_data)
+                analysis = data_agent.analyze_data(st.session_state.csv_data, provisional=provisional)
                 st.session_state.analysis_results = analysis
                 
+                # Chat reuses this summary until the data or its analysis changes
+                st.session_state.prompt_context = PromptContext(st.session_state.csv_data, analysis)
+                
                 # Store in memory
                 st.session_state.memory.store_analysis(analysis)
                 
@@ -374,14 +456,18 @@ def show_modern_chat_interface(executor_agent):
     question = st.text_input("Your question:", placeholder="e.g., What are the key trends in my data?")
     
     if st.button("🔍 Ask Question", type="primary") and question:
-        with st.spinner("🤖 Analyzing your question..."):
+        with st.container():
             try:
-                # Get answer from executor
-                answer = executor_agent.chat_with_data(
+                st.write(f"**You:** {question}")
+                st.write("**AI:**")
+                
+                # Render the answer as the executor streams it, then keep the full text
+                answer = st.write_stream(executor_agent.stream_chat_with_data(
                     question, 
                     st.session_state.csv_data, 
-                    st.session_state.analysis_results
-                )
+                    st.session_state.analysis_results,
+                    prompt_context=st.session_state.prompt_context
+                ))
                 
                 # Store in chat history
                 st.session_state.chat_history.append((question, answer))
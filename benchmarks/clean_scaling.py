@@ -0,0 +1,86 @@
+"""Benchmark parallel per-column cleaning in CSVProcessor.
+
+Writes a synthetic CSV (50 columns by default: currency strings, numeric strings,
+dates and free text), then loads it with an increasing number of cleaning workers
+and checks that every parallel result matches the serial one.
+
+    python benchmarks/clean_scaling.py --rows 5000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_processor import CSVProcessor
+
+def write_dataset(path, rows, columns, chunk_rows=500_000, seed=0):
+    """Write the synthetic CSV in chunks so the generator itself stays small"""
+    rng = np.random.default_rng(seed)
+    kinds = ['currency', 'number', 'date', 'text', 'category']
+    
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        data = {}
+        for i in range(columns):
+            kind = kinds[i % len(kinds)]
+            if kind == 'currency':
+                data[f'amount_{i}'] = np.char.add('$', np.char.mod('%.2f', rng.random(n) * 10_000))
+            elif kind == 'number':
+                data[f'count_{i}'] = rng.integers(0, 1_000_000, n).astype(str)
+            elif kind == 'date':
+                days = rng.integers(0, 3650, n).astype('timedelta64[D]')
+                data[f'order_date_{i}'] = pd.Series(np.datetime64('2015-01-01') + days).dt.strftime('%m/%d/%Y')
+            elif kind == 'text':
+                data[f'note_{i}'] = np.char.add('note ', rng.integers(0, 100_000, n).astype(str))
+            else:
+                data[f'segment_{i}'] = rng.choice(['north', 'south', 'east', 'west'], n)
+        
+        pd.DataFrame(data).to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--columns', type=int, default=50)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--engine', choices=['c', 'pyarrow'], default='pyarrow')
+    parser.add_argument('--pool', choices=['auto', 'thread', 'process'], default='auto')
+    args = parser.parse_args()
+    
+    path = os.path.join(tempfile.mkdtemp(), 'clean_scaling.csv')
+    print(f"Writing {args.rows:,} rows x {args.columns} columns to {path} ({os.cpu_count()} CPUs)")
+    write_dataset(path, args.rows, args.columns)
+    
+    # Parse once, then time only the cleaning stage on copies of the raw frame
+    processor = CSVProcessor(engine=args.engine, optimize_memory=False)
+    with open(path, 'rb') as f:
+        dialect = processor.sniff_dialect(f.read(processor.sniff_bytes))
+    raw = processor._read_csv(path, dialect)
+    
+    baseline, baseline_seconds = None, None
+    print(f"{args.engine} engine, {CSVProcessor(engine=args.engine, clean_pool=args.pool).clean_pool} pool")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    for workers in args.workers:
+        processor = CSVProcessor(engine=args.engine, optimize_memory=False, clean_workers=workers, clean_pool=args.pool)
+        
+        # Timed with the pool start-up, which every load pays once
+        start = time.perf_counter()
+        with processor._open_pool() as pool:
+            cleaned = processor._clean_dataframe(raw.copy(), pool)
+        seconds = time.perf_counter() - start
+        
+        if baseline is None:
+            baseline, baseline_seconds = cleaned, seconds
+        else:
+            pd.testing.assert_frame_equal(baseline, cleaned)
+        
+        print(f"{workers:>8} {seconds:>9.2f} {baseline_seconds / seconds:>7.2f}x")
+    
+    os.remove(path)
+
+if __name__ == '__main__':
+    main()
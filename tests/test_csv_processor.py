@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.csv_processor import CSVProcessor
+
+@pytest.fixture
+def late_columns_csv(tmp_path):
+    """Columns that are empty for the first chunks and filled later"""
+    n = 20_000
+    path = tmp_path / 'late_columns.csv'
+    pd.DataFrame({
+        'id': np.arange(n),
+        'comment': [None] * 10_000 + [f'note {i % 7}' for i in range(10_000)],
+        'shipped_date': [None] * 12_000 + ['2024-01-05'] * 8_000,
+        'amount': [None] * 6_000 + ['$1,200.50'] * 14_000
+    }).to_csv(path, index=False)
+    return path
+
+@pytest.mark.parametrize('engine', ['c', 'pyarrow'])
+def test_streamed_load_keeps_columns_empty_in_first_chunk(late_columns_csv, engine):
+    full = CSVProcessor(engine=engine).load_csv(late_columns_csv)
+    streamed = CSVProcessor(engine=engine, streaming=True, chunk_rows=5_000).load_csv(late_columns_csv)
+    
+    assert streamed['comment'].notna().sum() == 10_000
+    pd.testing.assert_frame_equal(full, streamed, check_categorical=False)
+
+def test_streamed_load_reports_raw_bytes_before_compaction(tmp_path):
+    n = 20_000
+    path = tmp_path / 'orders.csv'
+    pd.DataFrame({
+        'id': np.arange(n),
+        'region': np.random.default_rng(0).choice(['North', 'South', 'East', 'West'], n),
+        'amount': np.arange(n) * 1.5
+    }).to_csv(path, index=False)
+    
+    full = CSVProcessor()
+    full.load_csv(path)
+    streamed = CSVProcessor(streaming=True, chunk_rows=5_000)
+    streamed.load_csv(path)
+    
+    before, after = streamed.load_info['memory']['before_bytes'], streamed.load_info['memory']['after_bytes']
+    assert before == pytest.approx(full.load_info['memory']['before_bytes'], rel=0.05)
+    assert after < before / 2
+
+def test_streamed_load_over_memory_budget_fails_cleanly(late_columns_csv):
+    processor = CSVProcessor(streaming=True, chunk_rows=5_000, memory_budget_mb=0.1)
+    with pytest.raises(ValueError, match='memory budget'):
+        processor.load_csv(late_columns_csv)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.csv_processor import CSVProcessor
+from utils.parse_cache import ParseCache
+
+@pytest.fixture
+def orders_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 2000
+    path = tmp_path / 'orders.csv'
+    pd.DataFrame({
+        'order_id': np.arange(n),
+        'region': rng.choice(['North', 'South', 'East', 'West'], n),
+        'note': [f"note {i}" for i in range(n)],
+        'revenue': rng.gamma(2, 50, n).round(2)
+    }).to_csv(path, index=False)
+    return str(path)
+
+@pytest.mark.parametrize('engine', ['c', 'pyarrow'])
+def test_cache_hit_matches_first_load(tmp_path, orders_csv, engine):
+    cache_dir = str(tmp_path / 'cache')
+    first_load = CSVProcessor(engine=engine, cache=ParseCache(cache_dir)).load_csv(orders_csv)
+    
+    processor = CSVProcessor(engine=engine, cache=ParseCache(cache_dir))
+    cache_hit = processor.load_csv(orders_csv)
+    
+    assert processor.load_info['cache']['hit']
+    pd.testing.assert_frame_equal(first_load, cache_hit)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.query_engine import QueryEngine
+
+COLUMN_ANALYSIS = {
+    'numeric': ['order_id', 'customer_id', 'revenue', 'quantity', 'order_value'],
+    'categorical': ['region', 'product'],
+    'datetime': ['order_date'],
+    'boolean': [],
+    'text': []
+}
+
+@pytest.fixture(scope='module')
+def orders():
+    rng = np.random.default_rng(0)
+    n = 3000
+    return pd.DataFrame({
+        'order_id': np.arange(n),
+        'customer_id': rng.integers(0, 300, n),
+        'region': rng.choice(['North', 'South', 'East', 'West'], n),
+        'product': rng.choice(['Widget', 'Gadget'], n),
+        'revenue': rng.gamma(2, 50, n),
+        'quantity': rng.integers(1, 5, n),
+        'order_value': rng.gamma(2, 30, n),
+        'order_date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n), 'D')
+    })
+
+@pytest.fixture(scope='module')
+def engine(orders):
+    return QueryEngine(orders, COLUMN_ANALYSIS)
+
+@pytest.mark.parametrize('question, expected', [
+    ("total revenue by region", "total revenue by region"),
+    ("What is the total revenue?", "total revenue"),
+    ("average order value last month", "average order_value where 2024-11-01 <= order_date < 2024-12-01"),
+    ("how many orders in the North region", "number of rows where region == North"),
+    ("which region has the highest average revenue", "average revenue by region, top 1"),
+    ("top 2 products by total revenue", "total revenue by product, top 2"),
+    ("how many unique customers", "distinct count customer_id"),
+    ("what is the max quantity", "maximum quantity"),
+    ("sum of revenue where quantity over 2", "total revenue where quantity > 2.0"),
+    ("total revenue per month", "total revenue by order_date (month)"),
+    ("count orders by region", "number of rows by region"),
+    ("how many customers", "distinct count customer_id"),
+    ("how many regions", "distinct count region"),
+    ("how many customers by region", "distinct count customer_id by region"),
+    ("median revenue for Widget in 2024",
+     "median revenue where product == Widget and 2024-01-01 <= order_date < 2025-01-01"),
+])
+def test_parse_plans(engine, question, expected):
+    plan = engine.parse(question)
+    assert plan is not None, question
+    assert plan.describe() == expected
+
+@pytest.mark.parametrize('question', [
+    # No aggregate word
+    "Is revenue growing over time?",
+    "revenue by region",
+    "top 2 products by revenue",
+    # Intent the plan cannot express
+    "What percentage of revenue comes from North?",
+    "Compare revenue between North and South",
+    "total revenue North vs South",
+    "What is the trend in average revenue?",
+    "Why is total revenue down?",
+    # Words the parser does not recognise would be dropped
+    "How many widgets did we sell?",
+    "how many customers bought more than 2 items",
+    "total revenue from returning customers",
+    "average revenue per store",
+    "total revenue last month for premium accounts",
+    # Questions that are not aggregations
+    "What are the key trends?",
+    "tell me about North",
+])
+def test_parse_rejects(engine, question):
+    assert engine.parse(question) is None
+
+def test_execute_matches_pandas(engine, orders):
+    plan = engine.parse("total revenue by region")
+    result = engine.execute(orders, plan)
+    expected = orders.groupby('region')['revenue'].sum().sort_values(ascending=False)
+    assert list(result['region']) == list(expected.index)
+    assert np.allclose(result['sum_revenue'], expected.to_numpy())
+    
+    plan = engine.parse("how many orders in the North region")
+    assert engine.execute(orders, plan) == int((orders['region'] == 'North').sum())
+    
+    assert engine.execute(orders, engine.parse("how many customers")) == orders['customer_id'].nunique()
+    assert engine.execute(orders, engine.parse("how many regions")) == 4
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from utils.csv_processor import CSVProcessor
+from utils.sampled_loader import SampledLoad
+
+def test_preview_covers_the_whole_file(tmp_path):
+    # The file is sorted by region, so a sample of its start would be all North
+    n = 300_000
+    path = tmp_path / 'sorted.csv'
+    pd.DataFrame({
+        'id': np.arange(n),
+        'region': ['North'] * (n // 2) + ['South'] * (n // 2),
+        'amount': np.random.default_rng(0).gamma(2, 50, n).round(2)
+    }).to_csv(path, index=False)
+    
+    loader = SampledLoad(CSVProcessor(), str(path), sample_rows=2_000).start()
+    preview = loader.wait_for_sample()
+    
+    assert 1_500 <= len(preview) <= 2_000
+    assert 0.4 < (preview['region'] == 'South').mean() < 0.6
+    assert preview['id'].is_monotonic_increasing  # In file order
+    assert list(preview.columns) == ['id', 'region', 'amount']
+    assert len(loader.result()) == n
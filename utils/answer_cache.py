@@ -0,0 +1,134 @@
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+def load_embedder(model_name):
+    """Local sentence-embedding function for AnswerCache, or None if sentence-transformers is missing"""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("sentence-transformers is not installed; answer cache matches exact questions only")
+        return None
+    
+    model = SentenceTransformer(model_name)
+    return lambda text: model.encode(text, normalize_embeddings=True)
+
+class AnswerCache:
+    """In-memory LRU cache of chat answers, keyed by dataset fingerprint and question
+    
+    Questions are lowercased and whitespace-collapsed, so 'What are the key trends?' and
+    'what are the  key trends' share an entry. With an embedder, questions are also
+    bucketed by the sign pattern of their embedding against fixed random hyperplanes, and
+    a bucket hit is accepted only if the stored question's cosine similarity is at
+    least min_similarity. Entries for a dataset are dropped with invalidate() when it changes.
+    """
+    
+    def __init__(self, max_entries=512, embedder=None, bucket_bits=12, min_similarity=0.92):
+        self.max_entries = max_entries
+        self.embedder = embedder
+        self.bucket_bits = bucket_bits
+        self.min_similarity = min_similarity
+        
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (fingerprint, normalized question) -> answer, oldest first
+        self._buckets = {}  # (fingerprint, bucket) -> [(embedding, normalized question)]
+        self._hyperplanes = None
+    
+    @staticmethod
+    def normalize(question):
+        """'  What are the KEY trends? ' -> 'what are the key trends'"""
+        return re.sub(r'\s+', ' ', question.lower()).strip().rstrip('?!. ')
+    
+    def _embed(self, question):
+        """Unit embedding of the question and its hyperplane bucket, or (None, None) without an embedder"""
+        
+        if self.embedder is None:
+            return None, None
+        try:
+            embedding = np.asarray(self.embedder(question), dtype=float)
+        except Exception as e:
+            print(f"Question embedding failed: {str(e)}")
+            return None, None
+        
+        embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+        if self._hyperplanes is None or self._hyperplanes.shape[1] != len(embedding):
+            self._hyperplanes = np.random.default_rng(0).standard_normal((self.bucket_bits, len(embedding)))
+        bucket = (self._hyperplanes @ embedding > 0).tobytes()
+        return embedding, bucket
+    
+    def get(self, fingerprint, question):
+        """Cached answer for the question on this dataset, or None"""
+        
+        if fingerprint is None:
+            return None
+        
+        normalized = self.normalize(question)
+        embedding, bucket = self._embed(normalized)
+        
+        with self._lock:
+            key = (fingerprint, normalized)
+            
+            # A similar enough question in the same embedding bucket counts as the same question
+            if key not in self._entries and embedding is not None:
+                for stored, other in self._buckets.get((fingerprint, bucket), []):
+                    if float(stored @ embedding) >= self.min_similarity and (fingerprint, other) in self._entries:
+                        key = (fingerprint, other)
+                        break
+            
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+    
+    def put(self, fingerprint, question, answer):
+        """Store an answer, evicting the least recently used entries above max_entries"""
+        
+        if fingerprint is None or not answer:
+            return
+        
+        normalized = self.normalize(question)
+        embedding, bucket = self._embed(normalized)
+        
+        with self._lock:
+            key = (fingerprint, normalized)
+            self._entries[key] = answer
+            self._entries.move_to_end(key)
+            if embedding is not None:
+                self._buckets.setdefault((fingerprint, bucket), []).append((embedding, normalized))
+            
+            while len(self._entries) > self.max_entries:
+                (old_fingerprint, old_question), _ = self._entries.popitem(last=False)
+                self._forget_embedding(old_fingerprint, old_question)
+    
+    def _forget_embedding(self, fingerprint, question):
+        for bucket_key in [k for k in self._buckets if k[0] == fingerprint]:
+            kept = [(e, q) for e, q in self._buckets[bucket_key] if q != question]
+            if kept:
+                self._buckets[bucket_key] = kept
+            else:
+                del self._buckets[bucket_key]
+    
+    def invalidate(self, fingerprint):
+        """Drop every answer about a dataset that has been replaced or changed"""
+        
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == fingerprint]:
+                del self._entries[key]
+            for key in [k for k in self._buckets if k[0] == fingerprint]:
+                del self._buckets[key]
+    
+    def stats(self):
+        """Hit/miss counters for this process"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries)
+        }
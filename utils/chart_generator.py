@@ -2,12 +2,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
+from utils.downsampling import density_sample, lttb, numeric_axis
+from utils.distribution_stats import box_stats, histogram_counts
 
 class ChartGenerator:
     """Utility class for generating Plotly charts"""
     
-    def __init__(self):
+    def __init__(self, downsample_threshold=20_000, point_budget=4_000):
         self.color_palette = px.colors.qualitative.Set3
+        self.downsample_threshold = downsample_threshold  # Line and scatter series above this many rows are reduced...
+        self.point_budget = point_budget  # ...to this many points each
     
     def create_chart(self, df, chart_config):
         """Create a Plotly chart based on configuration"""
@@ -55,7 +59,7 @@ class ChartGenerator:
         
         if not x_axis:
             # If no x_axis specified, use first categorical or all columns
-            categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+            categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns
             x_axis = categorical_cols[0] if len(categorical_cols) > 0 else df.columns[0]
         
         if not y_axis:
@@ -77,7 +81,7 @@ class ChartGenerator:
         # Create grouped bar chart if color_by is specified
         if color_by:
             # Group by x_axis and color_by, aggregate y_axis
-            grouped_df = df.groupby([x_axis, color_by])[y_axis].sum().reset_index()
+            grouped_df = df.groupby([x_axis, color_by], observed=True)[y_axis].sum().reset_index()
             fig = px.bar(
                 grouped_df,
                 x=x_axis,
@@ -100,6 +104,7 @@ class ChartGenerator:
         
         # Sort by x_axis for better line visualization
         df_sorted = df.sort_values(by=x_axis)
+        df_sorted, downsampled = self._downsample(df_sorted, x_axis, y_axis, color_by, 'lttb')
         
         if color_by:
             fig = px.line(
@@ -113,6 +118,8 @@ class ChartGenerator:
         else:
             fig = px.line(df_sorted, x=x_axis, y=y_axis, title=title)
         
+        if downsampled:
+            fig.update_layout(meta={'downsampled': downsampled})
         return fig
     
     def _create_scatter_chart(self, df, title, x_axis, y_axis, color_by):
@@ -121,6 +128,8 @@ class ChartGenerator:
         if not x_axis or not y_axis:
             return self._create_error_chart(title, "Scatter plot requires both X and Y axes")
         
+        df, downsampled = self._downsample(df, x_axis, y_axis, color_by, 'density')
+        
         if color_by:
             fig = px.scatter(
                 df,
@@ -133,13 +142,58 @@ class ChartGenerator:
         else:
             fig = px.scatter(df, x=x_axis, y=y_axis, title=title)
         
+        if downsampled:
+            fig.update_layout(meta={'downsampled': downsampled})
         return fig
     
+    def _downsample(self, df, x_axis, y_axis, color_by, method):
+        """Rows to plot, with every color group above downsample_threshold rows reduced to point_budget points
+        
+        'lttb' keeps the visual shape of a line (df must be sorted by x_axis); 'density'
+        keeps the extent and density of a scatter cloud. Returns the rows and a summary for
+        the figure metadata, or None as the summary when nothing was reduced.
+        """
+        
+        if len(df) <= self.downsample_threshold or not pd.api.types.is_numeric_dtype(df[y_axis]):
+            return df, None
+        
+        x = numeric_axis(df[x_axis])
+        y = df[y_axis].to_numpy(dtype=float, na_value=np.nan)
+        if color_by:
+            groups = df.groupby(color_by, observed=True, sort=False).indices.values()
+        else:
+            groups = [np.arange(len(df))]
+        
+        keep, reduced = [], 0
+        for positions in groups:
+            if len(positions) <= self.downsample_threshold:
+                keep.append(positions)
+                continue
+            positions = positions[np.isfinite(x[positions]) & np.isfinite(y[positions])]
+            if method == 'lttb':
+                picked = lttb(x[positions], y[positions], self.point_budget)
+            else:
+                picked = density_sample(x[positions], y[positions], self.point_budget)
+            keep.append(positions[picked])
+            reduced += 1
+        
+        if not reduced:
+            return df, None
+        
+        rows = np.sort(np.concatenate(keep))
+        return df.iloc[rows], {
+            'method': method,
+            'rows': len(df),
+            'points': len(rows),
+            'point_budget': self.point_budget,
+            'groups_downsampled': reduced
+        }
+    
     def _create_pie_chart(self, df, title, x_axis, color_by):
         """Create a pie chart"""
         
         if not x_axis:
-            categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+            categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns
             x_axis = categorical_cols[0] if len(categorical_cols) > 0 else df.columns[0]
         
         # Get value counts for the pie chart
@@ -155,52 +209,121 @@ class ChartGenerator:
         return fig
     
     def _create_histogram(self, df, title, x_axis, color_by):
-        """Create a histogram"""
+        """Create a histogram from bins counted server-side, so the figure does not grow with the data"""
         
         if not x_axis:
             numeric_cols = df.select_dtypes(include=[np.number]).columns
             x_axis = numeric_cols[0] if len(numeric_cols) > 0 else df.columns[0]
         
-        if color_by:
-            fig = px.histogram(
-                df,
-                x=x_axis,
-                color=color_by,
-                title=title,
-                color_discrete_sequence=self.color_palette
-            )
-        else:
-            fig = px.histogram(df, x=x_axis, title=title)
+        column = df[x_axis]
+        is_datetime = pd.api.types.is_datetime64_any_dtype(column)
+        if not is_datetime and (not pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column)):
+            # Categories are their own bins
+            keys = [x_axis, color_by] if color_by else [x_axis]
+            counts = df.groupby(keys, observed=True).size().reset_index(name='count')
+            return px.bar(counts, x=x_axis, y='count', color=color_by, title=title,
+                          color_discrete_sequence=self.color_palette)
         
+        groups, names = self._color_groups(df, color_by)
+        keep = groups >= 0  # Rows without a color value are left out, as in the other charts
+        edges, counts = histogram_counts(numeric_axis(column)[keep], groups[keep], len(names))
+        centers = (edges[:-1] + edges[1:]) / 2
+        widths = np.diff(edges)
+        if is_datetime:
+            centers = pd.to_datetime(centers)
+            widths = widths / 1e6  # Bar widths on date axes are in milliseconds
+        
+        fig = go.Figure()
+        for i, name in enumerate(names):
+            fig.add_trace(go.Bar(
+                x=centers,
+                y=counts[i],
+                width=widths,
+                name=str(name) if color_by else x_axis,
+                marker_color=self.color_palette[i % len(self.color_palette)] if color_by else None
+            ))
+        
+        fig.update_layout(
+            title=title,
+            barmode='stack',
+            bargap=0,
+            xaxis_title=x_axis,
+            yaxis_title='count',
+            legend_title_text=color_by,
+            showlegend=bool(color_by)
+        )
         return fig
     
     def _create_box_plot(self, df, title, x_axis, y_axis, color_by):
-        """Create a box plot"""
+        """Create a box plot from quartiles, fences and a capped outlier sample computed server-side"""
         
         if not y_axis:
             numeric_cols = df.select_dtypes(include=[np.number]).columns
             y_axis = numeric_cols[0] if len(numeric_cols) > 0 else None
         
-        if not y_axis:
+        if not y_axis or not pd.api.types.is_numeric_dtype(df[y_axis]):
             return self._create_error_chart(title, "Box plot requires a numeric Y axis")
         
-        if x_axis:
-            if color_by:
-                fig = px.box(
-                    df,
-                    x=x_axis,
-                    y=y_axis,
-                    color=color_by,
-                    title=title,
-                    color_discrete_sequence=self.color_palette
-                )
-            else:
-                fig = px.box(df, x=x_axis, y=y_axis, title=title)
-        else:
-            fig = px.box(df, y=y_axis, title=title)
+        # One box per (color, x) pair
+        x_codes, x_names = pd.factorize(df[x_axis]) if x_axis else (np.zeros(len(df), dtype=np.int64), [None])
+        color_codes, color_names = self._color_groups(df, color_by)
+        values = df[y_axis].to_numpy(dtype=float, na_value=np.nan)
+        keep = (x_codes >= 0) & (color_codes >= 0)
+        groups = color_codes[keep] * len(x_names) + x_codes[keep]
+        stats, outliers = box_stats(values[keep], groups, len(color_names) * len(x_names))
+        
+        fig = go.Figure()
+        for i, name in enumerate(color_names):
+            boxes = [i * len(x_names) + j for j in range(len(x_names)) if stats['count'][i * len(x_names) + j]]
+            if not boxes:
+                continue
+            color = self.color_palette[i % len(self.color_palette)] if color_by else None
+            label = str(name) if color_by else y_axis
+            
+            fig.add_trace(go.Box(
+                x=[x_names[box % len(x_names)] for box in boxes] if x_axis else None,
+                q1=stats['q1'][boxes],
+                median=stats['median'][boxes],
+                q3=stats['q3'][boxes],
+                mean=stats['mean'][boxes],
+                lowerfence=stats['lowerfence'][boxes],
+                upperfence=stats['upperfence'][boxes],
+                name=label,
+                marker_color=color,
+                offsetgroup=label,
+                boxpoints=False
+            ))
+            
+            outlier_x = [x_names[box % len(x_names)] for box in boxes for _ in outliers[box]]
+            outlier_y = [value for box in boxes for value in outliers[box]]
+            if outlier_y:
+                fig.add_trace(go.Scatter(
+                    x=outlier_x if x_axis else [label] * len(outlier_y),
+                    y=outlier_y,
+                    mode='markers',
+                    marker=dict(color=color, size=4, symbol='circle-open'),
+                    name=f"{label} outliers",
+                    offsetgroup=label,
+                    showlegend=False
+                ))
         
+        fig.update_layout(
+            title=title,
+            boxmode='group',
+            scattermode='group',
+            xaxis_title=x_axis,
+            yaxis_title=y_axis,
+            legend_title_text=color_by,
+            showlegend=bool(color_by)
+        )
         return fig
     
+    def _color_groups(self, df, color_by):
+        """Group code per row (-1 for a missing color) and the group names, a single group without color_by"""
+        if not color_by:
+            return np.zeros(len(df), dtype=np.int64), [None]
+        return pd.factorize(df[color_by])
+    
     def _create_heatmap(self, df, title, x_axis, y_axis):
         """Create a heatmap (correlation matrix if no axes specified)"""
         
@@ -226,7 +349,8 @@ class ChartGenerator:
                     index=y_axis,
                     columns=x_axis,
                     values=df.select_dtypes(include=[np.number]).columns[0],
-                    aggfunc='mean'
+                    aggfunc='mean',
+                    observed=True
                 )
                 
                 fig = px.imshow(
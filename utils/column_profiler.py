@@ -0,0 +1,321 @@
+import hashlib
+import sys
+import numpy as np
+import pandas as pd
+from utils.sketches import HyperLogLog, KLLSketch, hash_series, mix64
+from utils.duplicate_tracker import DuplicateTracker
+
+class ColumnProfile:
+    """Running aggregates for one column, collected in a single pass over its values
+    
+    Every aggregate is mergeable (sketches merge, value counts add, moments combine with
+    Chan's formula), so appending rows updates the profile without rescanning what was
+    already seen. Distinct counts come from a HyperLogLog sketch; exact value counts are
+    only kept while the sketch says the column is low-cardinality, which is where the
+    categorical thresholds (fewer than 50 values, under half the rows) are decided.
+    """
+    
+    def __init__(self, name, dtype, exact_limit=1024):
+        self.name = name
+        self.dtype = dtype
+        self.kind = self._kind(dtype)
+        self.exact_limit = exact_limit  # Exact value counts are dropped above this many distinct values
+        self.memory_sample_rows = 10_000
+        
+        self.count = 0
+        self.null_count = 0
+        self.memory_bytes = 0
+        self.distinct = HyperLogLog()
+        self.value_counts = None
+        self.exact = True
+        
+        # Moments of the non-null values, numeric and boolean columns only
+        self.numeric_count = 0
+        self.mean = None
+        self.m2 = 0.0
+        
+        self.min = None
+        self.max = None
+        self.quantile_sketch = KLLSketch() if self.kind in ('numeric', 'datetime') else None
+    
+    @staticmethod
+    def _kind(dtype):
+        """Coarse dtype family that decides which aggregates are collected"""
+        # Booleans count as numeric in pandas, so check them first
+        if pd.api.types.is_bool_dtype(dtype):
+            return 'boolean'
+        if pd.api.types.is_numeric_dtype(dtype):
+            return 'numeric'
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return 'datetime'
+        return 'other'
+    
+    def update(self, series):
+        """Fold a batch of values into the profile; returns the 64-bit hash of every value"""
+        
+        missing = series.isna().to_numpy()
+        self.count += len(series)
+        self.null_count += int(missing.sum())
+        
+        hashes = hash_series(series, missing)
+        self.distinct.update(hashes[~missing])
+        
+        # Leave exact counting once the sketch is clearly past the limit, error margin included
+        if self.exact and self.distinct.count() > self.exact_limit * (1 + 3 * self.distinct.relative_error):
+            self.exact, self.value_counts = False, None
+        
+        counts = None
+        if self.exact:
+            counts = series.value_counts(dropna=False, sort=False)
+            if isinstance(counts.index, pd.CategoricalIndex):
+                counts.index = counts.index.astype(object)
+        self.memory_bytes += self._memory_bytes(series, counts)
+        
+        if counts is not None:
+            counts = counts[~counts.index.isna() & (counts > 0)]
+            if self.value_counts is None:
+                self.value_counts = counts
+            else:
+                self.value_counts = self.value_counts.add(counts, fill_value=0).astype('int64')
+            if len(self.value_counts) > self.exact_limit:
+                self.exact, self.value_counts = False, None
+        
+        if self.kind in ('numeric', 'datetime') and not missing.all():
+            low, high = series.min(), series.max()
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+        
+        if self.kind in ('numeric', 'boolean'):
+            values = series.to_numpy(dtype='float64', na_value=np.nan)[~missing]
+            self._update_moments(values)
+            if self.quantile_sketch is not None:
+                self.quantile_sketch.update(values)
+        elif self.kind == 'datetime':
+            stamps = pd.DatetimeIndex(series[~missing]).as_unit('ns')
+            self.quantile_sketch.update(stamps.asi8.astype('float64'))
+        
+        return hashes
+    
+    def _memory_bytes(self, series, counts):
+        """Deep memory of the batch, as Series.memory_usage(deep=True, index=False) reports it"""
+        
+        if series.dtype != object:
+            # Fixed-width, Arrow and categorical storage report their size without a scan
+            return int(series.memory_usage(deep=True, index=False))
+        
+        if counts is not None:
+            # Low-cardinality object columns: pointer array plus element sizes summed per distinct value
+            element_bytes = sum(sys.getsizeof(value) * count for value, count in counts.items())
+        else:
+            # High-cardinality object columns: extrapolate element sizes from an evenly spaced sample
+            values = series.to_numpy()
+            step = max(len(values) // self.memory_sample_rows, 1)
+            sample = values[::step]
+            element_bytes = sum(map(sys.getsizeof, sample)) * len(values) / max(len(sample), 1)
+        return int(series.array.nbytes + element_bytes)
+    
+    def _update_moments(self, values):
+        """Merge the batch mean and sum of squared deviations into the running moments"""
+        
+        if not len(values):
+            return
+        
+        n, mean = len(values), float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        
+        if not self.numeric_count:
+            self.numeric_count, self.mean, self.m2 = n, mean, m2
+            return
+        
+        total = self.numeric_count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.numeric_count * n / total
+        self.numeric_count = total
+    
+    @property
+    def distinct_count(self):
+        """Exact while the column is low-cardinality, a HyperLogLog estimate above that"""
+        if self.exact:
+            return len(self.value_counts) if self.value_counts is not None else 0
+        return self.distinct.count()
+    
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1), as pandas reports it"""
+        if self.numeric_count < 2:
+            return None
+        return (self.m2 / (self.numeric_count - 1)) ** 0.5
+    
+    def quantiles(self, qs=(0.25, 0.5, 0.75)):
+        """Approximate quantiles of numeric and datetime columns"""
+        if self.quantile_sketch is None:
+            return None
+        values = self.quantile_sketch.quantiles(qs)
+        if self.kind == 'datetime':
+            tz = getattr(self.dtype, 'tz', None)
+            values = [None if value is None else pd.Timestamp(int(value), tz=tz) for value in values]
+        return values
+    
+    def top_values(self, limit=5):
+        """Most frequent values with their counts (low-cardinality columns only)"""
+        if self.value_counts is None:
+            return []
+        top = self.value_counts.nlargest(limit)
+        return [{'value': _to_python(value), 'count': int(count)} for value, count in top.items()]
+    
+    @property
+    def semantic_type(self):
+        """Column type as reported in the analysis: numeric, categorical, datetime, boolean or text"""
+        if self.kind != 'other':
+            return self.kind
+        return 'categorical' if self.is_categorical(self.distinct_count, self.count) else 'text'
+    
+    @staticmethod
+    def is_categorical(distinct_count, count):
+        """Whether a non-numeric column with these counts is categorical rather than free text"""
+        return bool(count) and distinct_count / count < 0.5 and distinct_count < 50
+    
+    def to_dict(self):
+        """JSON-friendly summary of the column"""
+        return {
+            'dtype': str(self.dtype),
+            'semantic_type': self.semantic_type,
+            'count': self.count,
+            'null_count': self.null_count,
+            'distinct_count': self.distinct_count,
+            'distinct_exact': self.exact,
+            'min': _to_python(self.min),
+            'max': _to_python(self.max),
+            'mean': self.mean,
+            'std': self.std,
+            'quantiles': self._quantiles_dict(),
+            'top_values': self.top_values(),
+            'memory_bytes': self.memory_bytes
+        }
+    
+    def _quantiles_dict(self):
+        values = self.quantiles()
+        if values is None:
+            return None
+        return dict(zip(['p25', 'p50', 'p75'], [_to_python(value) for value in values]))
+
+class DatasetProfile:
+    """Per-column profiles of a dataframe; every analysis section is derived from these"""
+    
+    def __init__(self, df=None):
+        self.reset()
+        if df is not None:
+            self.update(df)
+    
+    def reset(self):
+        """Forget everything profiled so far"""
+        self.rows = 0
+        self.index_bytes = 0
+        self.columns = {}
+        self.duplicates = DuplicateTracker()
+        return self
+    
+    def matches(self, df):
+        """True when df has the profiled columns with the same dtypes, so its rows can be appended
+        
+        Value hashes depend on the dtype, so rows of a drifted dtype (ints that became
+        floats, say) would not line up with the stored duplicate hashes.
+        """
+        if list(df.columns) != list(self.columns):
+            return False
+        return all(str(df[col].dtype) == str(profile.dtype) for col, profile in self.columns.items())
+    
+    def update(self, df):
+        """Profile a dataframe, or append its rows to an existing profile"""
+        
+        # Value hashes from the column pass are folded into two 64-bit lanes per row,
+        # giving every row a 128-bit hash for duplicate detection at no extra scan
+        lane1 = np.full(len(df), 0x9E3779B97F4A7C15, dtype=np.uint64)
+        lane2 = np.full(len(df), 0xC2B2AE3D27D4EB4F, dtype=np.uint64)
+        
+        for col in df.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col, df[col].dtype)
+            hashes = self.columns[col].update(df[col])
+            
+            lane1 *= np.uint64(0x100000001B3)
+            lane1 += hashes
+            lane2 ^= hashes
+            lane2 *= np.uint64(0xFF51AFD7ED558CCD)
+        
+        self.duplicates.add(mix64(lane1), mix64(lane2))
+        self.rows += len(df)
+        self.index_bytes += int(df.index.memory_usage(deep=True))
+        return self
+    
+    @property
+    def memory_bytes(self):
+        return self.index_bytes + sum(profile.memory_bytes for profile in self.columns.values())
+    
+    @property
+    def missing_values(self):
+        return sum(profile.null_count for profile in self.columns.values())
+    
+    def duplicate_rows(self, df):
+        """Rows equal to an earlier row; df is the full frame profiled so far"""
+        return self.duplicates.count(df)
+    
+    def fingerprint(self):
+        """Content fingerprint of the profiled frame, from the row hashes already collected"""
+        
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr([(col, str(profile.dtype)) for col, profile in self.columns.items()]).encode())
+        digest.update(self.duplicates.fingerprint().encode())
+        return digest.hexdigest()
+    
+    def columns_by_type(self):
+        """Column names grouped by semantic type, in column order"""
+        analysis = {
+            'numeric': [],
+            'categorical': [],
+            'datetime': [],
+            'boolean': [],
+            'text': []
+        }
+        for col, profile in self.columns.items():
+            analysis[profile.semantic_type].append(col)
+        return analysis
+    
+    def to_dict(self):
+        return {col: profile.to_dict() for col, profile in self.columns.items()}
+
+def semantic_column_types(df, prefix_rows=10_000):
+    """Column names grouped by semantic type, as DatasetProfile(df).columns_by_type() reports them
+    
+    Needs only the dtypes and, for non-numeric columns, a distinct count: 50 distinct
+    values in a prefix already rule out 'categorical', so high-cardinality text columns
+    are never scanned in full.
+    """
+    
+    analysis = {
+        'numeric': [],
+        'categorical': [],
+        'datetime': [],
+        'boolean': [],
+        'text': []
+    }
+    for col in df.columns:
+        series = df[col]
+        kind = ColumnProfile._kind(series.dtype)
+        if kind == 'other':
+            kind = 'text'
+            if series.head(prefix_rows).nunique() < 50 and ColumnProfile.is_categorical(series.nunique(), len(series)):
+                kind = 'categorical'
+        analysis[kind].append(col)
+    return analysis
+
+def _to_python(value):
+    """Convert numpy and pandas scalars to JSON-friendly Python values"""
+    if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
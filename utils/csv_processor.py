@@ -1,72 +1,466 @@
 import pandas as pd
 import numpy as np
-from io import StringIO
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
+import codecs
+import contextlib
+import csv
+import mmap
+import os
+import shutil
+import tempfile
+import warnings
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 class CSVProcessor:
     """Utility class for processing CSV files"""
     
-    def __init__(self):
+    def __init__(self, engine='c', streaming=False, streaming_threshold_mb=200, chunk_rows=100_000,
+                 memory_budget_mb=None, optimize_memory=True, cache=None, clean_workers=1, clean_pool='auto'):
         self.supported_encodings = ['utf-8', 'latin1', 'cp1252', 'iso-8859-1']
+        self.supported_delimiters = [',', ';', '\t', '|']
+        self.sniff_bytes = 64 * 1024  # Bounded prefix used to detect the dialect
+        self.inference_sample_rows = 1000  # Values per column used to decide its type
+        self.date_keywords = ['date', 'time', 'created', 'updated', 'timestamp']
+        
+        # 'c' parses into NumPy/object columns, 'pyarrow' uses the multithreaded Arrow reader
+        # and cleans on Arrow-backed dtypes
+        if engine not in ('c', 'pyarrow'):
+            raise ValueError(f"Unsupported CSV engine: {engine}")
+        self.engine = engine
+        
+        # Streaming ingestion: always, or automatically for files above the threshold
+        self.streaming = streaming
+        self.streaming_threshold_mb = streaming_threshold_mb
+        self.chunk_rows = chunk_rows
+        self.memory_budget_mb = memory_budget_mb  # Streamed loads that would hold more than this fail cleanly
+        
+        # Downcast and categorize the cleaned frame (and streamed chunks as they arrive) so sessions hold less memory
+        self.optimize_memory = optimize_memory
+        self.category_max_ratio = 0.5  # Unique/total ratio below which text becomes categorical
+        
+        # Optional ParseCache: repeat uploads skip parsing and cleaning entirely
+        self.cache = cache
+        
+        # Per-column cleaning runs serially, or on a thread/process pool with this many workers.
+        # 'auto' picks processes for the C engine, whose object-column string cleaning holds
+        # the GIL, and threads for Arrow, whose compute kernels release it
+        if clean_pool not in ('auto', 'thread', 'process'):
+            raise ValueError(f"Unsupported cleaning pool: {clean_pool}")
+        if clean_pool == 'auto':
+            clean_pool = 'process' if engine == 'c' else 'thread'
+        self.clean_workers = clean_workers
+        self.clean_pool = clean_pool
+        
+        self.spool_block_bytes = 1024 * 1024  # Copy size when spooling uploads to disk
+        self.load_info = {}
+    
+    def spool_upload(self, uploaded_file, spool_dir=None):
+        """Stream an uploaded file object to a temporary CSV file and return its path"""
+        
+        uploaded_file.seek(0)
+        with tempfile.NamedTemporaryFile('wb', suffix='.csv', dir=spool_dir, delete=False) as spool:
+            shutil.copyfileobj(uploaded_file, spool, self.spool_block_bytes)
+        
+        return spool.name
+    
+    def load_csv(self, uploaded_file, on_chunk=None):
+        """Load and process an uploaded CSV file object, or the path of a spooled CSV file
+        
+        on_chunk(chunk, chunk_number) is called with every cleaned chunk and forces streaming;
+        chunk_number restarts at 0 if the stream has to be re-read.
+        """
+        
+        if isinstance(uploaded_file, (str, os.PathLike)):
+            # Sniff and hash through a read-only memory map; pandas maps the file itself to parse it
+            with open(uploaded_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                return self._load(view, uploaded_file, on_chunk)
+        
+        return self._load(uploaded_file, uploaded_file, on_chunk)
+    
+    def _load(self, view, source, on_chunk=None):
+        """Load from source, reading the sniffing prefix and cache hash through view"""
+        
+        # Repeat uploads are served from the parse cache
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(view, self._settings_key())
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                df, self.load_info = cached
+                self.load_info['cache'] = {'hit': True, 'key': cache_key}
+                return df
+        
+        # Sniff encoding, delimiter and quote character from a bounded prefix
+        view.seek(0)
+        prefix = view.read(self.sniff_bytes)
+        dialect = self.sniff_dialect(prefix)
+        
+        # Stream large files in chunks, otherwise parse the full file exactly once
+        streaming = (self.streaming or on_chunk is not None
+                     or self._file_size(view) > self.streaming_threshold_mb * 1024 * 1024)
+        with self._open_pool() as pool:
+            if streaming:
+                df, chunk_stats = self._load_chunked(source, dialect, on_chunk, pool)
+            else:
+                df = self._read_csv(source, dialect)
+            
+                if df is None or not self._validate_dataframe(df):
+                    raise ValueError("Could not read CSV file with the detected format")
+            
+                # Clean and process the dataframe
+                df = self._clean_dataframe(df, pool)
+        
+        # Report the detected dialect back to the caller
+        self.load_info = {'dialect': dialect, 'engine': self.engine, 'streaming': streaming}
+        if streaming:
+            self.load_info['chunks'] = chunk_stats
+        
+        if self.optimize_memory:
+            df, self.load_info['memory'] = self.optimize_dataframe(df)
+            if streaming:
+                # Chunks were compacted as they arrived; report their size before that
+                self.load_info['memory']['before_bytes'] = chunk_stats['raw_bytes']
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, df, self.load_info)
+            self.load_info['cache'] = {'hit': False, 'key': cache_key}
+        
+        return df
+    
+    def _settings_key(self):
+        """Processor settings that change the cleaned result, for the parse cache key"""
+        
+        return (
+            self.engine,
+            tuple(self.supported_encodings),
+            tuple(self.supported_delimiters),
+            self.sniff_bytes,
+            self.inference_sample_rows,
+            tuple(self.date_keywords),
+            self.optimize_memory,
+            self.category_max_ratio
+        )
+    
+    def _file_size(self, uploaded_file):
+        """Size of the upload in bytes, leaving the file pointer at the start"""
+        
+        size = getattr(uploaded_file, 'size', None)
+        if not isinstance(size, int):
+            uploaded_file.seek(0, os.SEEK_END)
+            size = uploaded_file.tell()
+        uploaded_file.seek(0)
+        return size
+    
+    def sniff_dialect(self, prefix):
+        """Detect encoding, delimiter and quote character from the first bytes of a file"""
+        
+        encoding = None
+        if isinstance(prefix, bytes):
+            encoding, text = self._detect_encoding(prefix)
+        else:
+            text = prefix
+        
+        # Drop the last line, which is likely cut off by the prefix limit
+        lines = text.splitlines()
+        if len(text) >= self.sniff_bytes and len(lines) > 1:
+            lines = lines[:-1]
+        sample = '\n'.join(lines)
+        
+        delimiter = ','
+        quotechar = '"'
+        try:
+            sniffed = csv.Sniffer().sniff(sample, delimiters=''.join(self.supported_delimiters))
+            delimiter = sniffed.delimiter
+            quotechar = sniffed.quotechar or '"'
+        except csv.Error:
+            delimiter = self._guess_delimiter(lines)
+        
+        return {
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'quotechar': quotechar
+        }
     
-    def load_csv(self, uploaded_file):
-        """Load and process uploaded CSV file with error handling"""
+    def _detect_encoding(self, prefix):
+        """Pick the first supported encoding that decodes the prefix"""
+        
+        if prefix.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig', prefix[len(codecs.BOM_UTF8):].decode('utf-8', errors='ignore')
         
-        # Try different encodings
         for encoding in self.supported_encodings:
             try:
-                # Reset file pointer
-                uploaded_file.seek(0)
-                
-                # Read file content
-                content = uploaded_file.read()
+                # Incremental decoding tolerates a multi-byte character cut at the end
+                decoder = codecs.getincrementaldecoder(encoding)()
+                return encoding, decoder.decode(prefix, final=False)
+            except UnicodeDecodeError:
+                continue
+        
+        raise ValueError("Could not read CSV file with any supported encoding")
+    
+    def _guess_delimiter(self, lines):
+        """Fallback delimiter detection: the delimiter with the most consistent count per line"""
+        
+        lines = [line for line in lines[:50] if line.strip()]
+        best_delimiter, best_count = ',', 0
+        
+        for delimiter in self.supported_delimiters:
+            counts = [line.count(delimiter) for line in lines]
+            if counts and min(counts) > 0 and min(counts) == max(counts) and counts[0] > best_count:
+                best_delimiter, best_count = delimiter, counts[0]
+        
+        return best_delimiter
+    
+    def _read_csv(self, source, dialect, **kwargs):
+        """Read the CSV with the detected dialect"""
+        
+        try:
+            df = self._read_with_dialect(source, dialect, **kwargs)
+            binary_columns = self._binary_columns(df)
+            if not binary_columns:
+                return df
+            # The Arrow reader keeps text it cannot decode as binary columns instead of raising
+            print(f"Columns {binary_columns} are not valid {dialect['encoding']}")
+        except UnicodeDecodeError as e:
+            print(f"Failed to read with encoding {dialect['encoding']}: {e}")
+        except Exception as e:
+            print(f"CSV read failed with dialect {dialect}: {e}")
+            return None
+        
+        # Undecodable bytes beyond the sniffed prefix: latin1 accepts any byte
+        dialect['encoding'] = 'latin1'
+        return self._read_with_dialect(source, dialect, **kwargs)
+    
+    def _read_with_dialect(self, source, dialect, **kwargs):
+        return pd.read_csv(
+            source,
+            sep=dialect['delimiter'],
+            quotechar=dialect['quotechar'],
+            encoding=dialect['encoding'],
+            **self._engine_options(source),
+            **kwargs
+        )
+    
+    def _binary_columns(self, df):
+        """Names of Arrow binary columns, which hold text that did not decode"""
+        
+        binary = []
+        for col in df.columns:
+            dtype = df[col].dtype
+            if isinstance(dtype, pd.ArrowDtype) and (
+                    pa.types.is_binary(dtype.pyarrow_dtype) or pa.types.is_large_binary(dtype.pyarrow_dtype)):
+                binary.append(col)
+        return binary
+    
+    def _engine_options(self, source, streaming=False):
+        """pd.read_csv options for the selected engine, rewinding file objects"""
+        
+        if isinstance(source, (str, os.PathLike)):
+            # Spooled files are parsed from a memory map, except by the Arrow reader which has its own IO
+            options = {} if self.engine == 'pyarrow' and not streaming else {'memory_map': True}
+        else:
+            source.seek(0)
+            options = {}
+        
+        if self.engine != 'pyarrow':
+            return options
+        
+        # The Arrow reader cannot iterate in chunks; streaming keeps the C parser but
+        # still produces Arrow-backed columns
+        if streaming:
+            return {**options, 'dtype_backend': 'pyarrow'}
+        return {**options, 'engine': 'pyarrow', 'dtype_backend': 'pyarrow'}
+    
+    def _load_chunked(self, source, dialect, on_chunk=None, pool=None):
+        """Stream the CSV in chunks, cleaning and compacting each one as it is read"""
+        
+        try:
+            return self._assemble_chunks(source, dialect, on_chunk, pool)
+        except UnicodeDecodeError as e:
+            # Undecodable bytes beyond the sniffed prefix: restart the stream as latin1
+            print(f"Failed to stream with encoding {dialect['encoding']}: {e}")
+            dialect['encoding'] = 'latin1'
+            return self._assemble_chunks(source, dialect, on_chunk, pool)
+    
+    def _assemble_chunks(self, source, dialect, on_chunk=None, pool=None):
+        """Clean chunks into per-column lists and concatenate them into the final frame
+        
+        With optimize_memory, every chunk is compacted before it is held: integers are
+        downcast and the text columns that are low-cardinality in the first chunk become
+        categories, whose categories are unioned at the end. The raw text of the file is
+        never held all at once, and held chunks over memory_budget_mb stop the load.
+        """
+        
+        reader = pd.read_csv(
+            source,
+            sep=dialect['delimiter'],
+            quotechar=dialect['quotechar'],
+            encoding=dialect['encoding'],
+            chunksize=self.chunk_rows,
+            **self._engine_options(source, streaming=True)
+        )
+        
+        budget_bytes = None if self.memory_budget_mb is None else self.memory_budget_mb * 1024 * 1024
+        columns, plan, non_null, categorical = None, None, None, None
+        held = {}  # Column -> its cleaned chunks, each owning its data so it can be freed on its own
+        chunk_stats = {'count': 0, 'raw_bytes': 0, 'held_bytes': 0}
+        
+        with reader:
+            for chunk in reader:
+                if plan is None:
+                    # The first chunk fixes the column names and the conversions for every chunk
+                    if not self._validate_dataframe(chunk):
+                        raise ValueError("Could not read CSV file with the detected format")
+                    columns = self._clean_column_names(chunk.columns)
+                    chunk.columns = columns
+                    plan = self._plan_conversions(chunk, pool)
+                    non_null = pd.Series(0, index=columns)
+                    held = {col: [] for col in columns}
+                else:
+                    chunk.columns = columns
+                    if plan['pending']:
+                        self._plan_pending(chunk, plan, pool)
                 
-                # Convert bytes to string if necessary
-                if isinstance(content, bytes):
-                    content = content.decode(encoding)
+                chunk = self._clean_chunk(chunk, plan, pool)
+                if on_chunk is not None:
+                    on_chunk(chunk, chunk_stats['count'])
+                non_null += chunk.notna().sum()
                 
-                # Create StringIO object for pandas
-                csv_buffer = StringIO(content)
+                chunk_bytes = int(chunk.memory_usage(deep=True).sum())
+                chunk_stats['raw_bytes'] += chunk_bytes
+                if self.optimize_memory:
+                    if categorical is None:
+                        categorical = self._category_columns(chunk)
+                    chunk = self._compact_chunk(chunk, categorical)
+                    chunk_bytes = int(chunk.memory_usage(deep=True).sum())
+                chunk_stats['held_bytes'] += chunk_bytes
+                chunk_stats['count'] += 1
                 
-                # Try to read CSV with different parameters
-                df = self._try_csv_read(csv_buffer)
+                if budget_bytes is not None and chunk_stats['held_bytes'] > budget_bytes:
+                    raise ValueError(
+                        f"CSV needs more than the {self.memory_budget_mb} MB memory budget "
+                        f"(exceeded after {chunk_stats['count']} chunks)")
                 
-                if df is not None and not df.empty:
-                    # Clean and process the dataframe
-                    df = self._clean_dataframe(df)
-                    return df
-                    
-            except Exception as e:
-                print(f"Failed to read with encoding {encoding}: {e}")
-                continue
+                for col in columns:
+                    held[col].append(chunk[col].copy())
+                del chunk
         
-        raise ValueError("Could not read CSV file with any supported encoding")
+        if plan is None:
+            raise ValueError("Could not read CSV file with the detected format")
+        
+        # Columns where all values are NaN across the whole file are left out
+        keep = [col for col in columns if non_null[col] > 0]
+        return self._concat_chunks(held, keep), chunk_stats
+    
+    def _category_columns(self, chunk):
+        """Text columns of a cleaned chunk that are worth holding as categories"""
+        
+        return {
+            col for col in chunk.columns
+            if (chunk[col].dtype == 'object' or pd.api.types.is_string_dtype(chunk[col]))
+            and chunk[col].nunique() < self.category_max_ratio * max(len(chunk), 1)
+        }
+        
+    def _compact_chunk(self, chunk, categorical):
+        """Downcast integers and categorize the chosen text columns of one chunk"""
+        
+        for col in chunk.columns:
+            series = chunk[col]
+            if col in categorical:
+                chunk[col] = series.astype('category')
+            elif pd.api.types.is_integer_dtype(series):
+                chunk[col] = pd.to_numeric(series, downcast='integer')
+        
+        return chunk
     
-    def _try_csv_read(self, csv_buffer):
-        """Try different CSV reading parameters"""
+    def _align_empty_parts(self, parts):
+        """Give chunks in which a column is entirely empty the dtype of its first chunk with values
+        
+        A column empty at the start of the file parses as float NaN there, which would
+        otherwise turn the concatenated column into object.
+        """
         
-        # Common CSV reading configurations
-        configs = [
-            {'sep': ',', 'encoding': None},
-            {'sep': ';', 'encoding': None},
-            {'sep': '\t', 'encoding': None},
-            {'sep': ',', 'encoding': None, 'quotechar': '"'},
-            {'sep': ',', 'encoding': None, 'quotechar': "'"},
+        template = next((part for part in parts if part.notna().any()), None)
+        if template is None:
+            return parts
+        return [
+            part if part is template or part.dtype == template.dtype or part.notna().any()
+            else pd.Series(index=part.index, dtype=template.dtype, name=part.name)
+            for part in parts
         ]
+    
+    def _concat_chunks(self, held, columns):
+        """Concatenate every column's held chunks, unioning the categories of categorical columns
         
-        for config in configs:
-            try:
-                csv_buffer.seek(0)
-                df = pd.read_csv(csv_buffer, **config)
-                
-                # Validate the dataframe
-                if self._validate_dataframe(df):
-                    return df
-                    
-            except Exception as e:
-                print(f"CSV read attempt failed with config {config}: {e}")
+        The chunks of a column are released as soon as it is built (held is emptied), so
+        peak memory is the held chunks plus one column rather than twice the frame.
+        """
+        
+        result = {}
+        for col in columns:
+            parts = self._align_empty_parts(held.pop(col))
+            if len(parts) == 1:
+                result[col] = parts[0].reset_index(drop=True)
                 continue
+            if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+                try:
+                    # Plain concat turns categories that differ into object
+                    combined = union_categoricals(parts)
+                except TypeError:
+                    combined = None
+                if combined is not None:
+                    # Columns that turned out high-cardinality go back to their text dtype
+                    if len(combined.categories) >= self.category_max_ratio * len(combined):
+                        combined = combined.astype(combined.categories.dtype)
+                    result[col] = combined
+                    continue
+            result[col] = pd.concat(parts, ignore_index=True)
+        held.clear()
         
-        return None
+        # copy=False keeps each built column as is instead of consolidating them into new blocks
+        return pd.DataFrame(result, copy=False)
+    
+    def _plan_conversions(self, chunk, pool=None):
+        """Decide numeric and date conversions from the first chunk
+        
+        Columns with no values in the chunk say nothing about their type (they parse as
+        float NaN); they are listed in plan['pending'] and planned from the first chunk
+        where they have values.
+        """
+        
+        pending = [col for col in chunk.columns if not chunk[col].notna().any()]
+        filled = chunk.drop(columns=pending).dropna(how='all')
+        plan = self._infer_column_types(filled, pool)
+        
+        # Columns parsed as numbers in the first chunk stay numeric in every chunk
+        plan['numeric'] += [col for col in filled.columns if pd.api.types.is_numeric_dtype(filled[col])]
+        plan['pending'] = pending
+        return plan
+    
+    def _plan_pending(self, chunk, plan, pool=None):
+        """Plan the conversions of columns that were empty in every chunk so far, if this chunk has their values"""
+        
+        later = self._plan_conversions(chunk[plan['pending']], pool)
+        plan['numeric'] += later['numeric']
+        plan['datetime'].update(later['datetime'])
+        plan['pending'] = later['pending']
+    
+    def _clean_chunk(self, chunk, plan, pool=None):
+        """Apply the planned cleaning steps to one chunk"""
+        
+        chunk = chunk.dropna(how='all')
+        
+        numeric_columns = [col for col in plan['numeric'] if not pd.api.types.is_numeric_dtype(chunk[col])]
+        converted = self._map_columns(self._coerce_numeric, [chunk[col] for col in numeric_columns], pool)
+        for col, (numeric_series, _) in zip(numeric_columns, converted):
+            chunk[col] = numeric_series
+        
+        chunk = self._convert_date_columns(chunk, plan['datetime'], pool)
+        
+        return self._normalize_arrow_dtypes(chunk)
     
     def _validate_dataframe(self, df):
         """Validate that the dataframe is reasonable"""
@@ -85,80 +479,260 @@ class CSVProcessor:
         
         return True
     
-    def _clean_dataframe(self, df):
+    def _clean_dataframe(self, df, pool=None):
         """Clean and preprocess the dataframe"""
         
-        # Clean column names
-        df.columns = df.columns.astype(str)
-        df.columns = [col.strip() for col in df.columns]
+        # Clean column names and handle duplicates
+        df.columns = self._clean_column_names(df.columns)
         
         # Remove completely empty rows and columns
         df = df.dropna(how='all')  # Remove rows where all values are NaN
         df = df.dropna(axis=1, how='all')  # Remove columns where all values are NaN
         
+        # Decide column types from a sample, then convert only the columns that qualify
+        plan = self._infer_column_types(df, pool)
+        
         # Convert obvious numeric columns
-        df = self._convert_numeric_columns(df)
+        df = self._convert_numeric_columns(df, plan['numeric'], pool)
         
         # Convert obvious date columns
-        df = self._convert_date_columns(df)
+        df = self._convert_date_columns(df, plan['datetime'], pool)
         
-        # Handle duplicate column names
-        df = self._handle_duplicate_columns(df)
+        return self._normalize_arrow_dtypes(df)
+    
+    def _clean_column_names(self, columns):
+        """Strip column names and rename duplicates"""
         
-        return df
+        return self._handle_duplicate_columns([str(col).strip() for col in columns])
+    
+    @staticmethod
+    def _strip_numeric_formatting(series):
+        """Remove currency symbols, commas and whitespace before numeric conversion"""
+        
+        cleaned_series = series.astype(str).str.replace(r'[$,\s]', '', regex=True)
+        return cleaned_series.replace(['', 'nan', 'NaN', 'null'], np.nan)
+    
+    @staticmethod
+    def _is_arrow_string(series):
+        """Check for an Arrow-backed string column"""
+        
+        dtype = series.dtype
+        if isinstance(dtype, pd.ArrowDtype):
+            return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+        return isinstance(dtype, pd.StringDtype) and dtype.storage == 'pyarrow'
+    
+    @staticmethod
+    def _coerce_numeric(series):
+        """Convert a text column to numbers, returning it with its count of non-null cleaned values"""
+        
+        if not CSVProcessor._is_arrow_string(series):
+            cleaned_series = CSVProcessor._strip_numeric_formatting(series)
+            return pd.to_numeric(cleaned_series, errors='coerce'), cleaned_series.notna().sum()
+        
+        # Arrow path: regex, validation and cast all run as vectorized Arrow compute kernels
+        values = pa.array(series.array)
+        cleaned = pc.replace_substring_regex(values, pattern=r'[$,\s]', replacement='')
+        missing = pc.is_in(cleaned, value_set=pa.array(['', 'nan', 'NaN', 'null'], type=cleaned.type))
+        cleaned = pc.if_else(missing, pa.scalar(None, type=cleaned.type), cleaned)
+        
+        valid = pc.match_substring_regex(cleaned, pattern=r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+        numbers = pc.if_else(valid, cleaned, pa.scalar(None, type=cleaned.type))
+        
+        # Match pd.to_numeric: integers stay integers unless values are missing
+        integers = pc.match_substring_regex(numbers, pattern=r'^[+-]?\d+$')
+        if numbers.null_count == 0 and pc.all(integers).as_py():
+            numbers = pc.cast(numbers, pa.int64())
+        else:
+            numbers = pc.cast(numbers, pa.float64())
+        
+        numeric_series = pd.Series(numbers, index=series.index, name=series.name, dtype=pd.ArrowDtype(numbers.type))
+        return numeric_series, len(cleaned) - cleaned.null_count
+    
+    def _infer_column_types(self, df, pool=None):
+        """Decide from a sample which text columns become numeric and which become dates (with their format)"""
+        
+        plan = {'numeric': [], 'datetime': {}}
+        
+        # Only text columns need type inference; samples are drawn here so workers only see samples
+        samples = [
+            self._sample_values(df[col]) for col in df.columns
+            if df[col].dtype == 'object' or self._is_arrow_string(df[col])
+        ]
+        
+        infer = partial(self._infer_column_type, date_keywords=tuple(self.date_keywords))
+        for sample, (target_type, date_format) in zip(samples, self._map_columns(infer, samples, pool)):
+            if target_type == 'numeric':
+                plan['numeric'].append(sample.name)
+            elif target_type == 'datetime':
+                plan['datetime'][sample.name] = date_format
+        
+        return plan
+    
+    @staticmethod
+    def _infer_column_type(sample, date_keywords):
+        """Target type ('numeric', 'datetime' or None) and date format for one column's sample"""
+        
+        if sample.empty:
+            return None, None
+        
+        # Numeric if more than 50% of the sampled values can be converted
+        numeric_sample, non_null_count = CSVProcessor._coerce_numeric(sample)
+        if non_null_count > 0 and numeric_sample.notna().sum() / non_null_count > 0.5:
+            return 'numeric', None
+        
+        # Dates are detected by content; a date-like column name lowers the bar
+        name_hint = any(keyword in sample.name.lower() for keyword in date_keywords)
+        date_format = CSVProcessor._infer_date_format(sample, name_hint)
+        if date_format:
+            return 'datetime', date_format
+        
+        return None, None
+    
+    def _open_pool(self):
+        """Cleaning pool shared by every per-column step of one load (None when cleaning is serial)"""
+        
+        if self.clean_workers <= 1:
+            return contextlib.nullcontext()
+        pool_class = ProcessPoolExecutor if self.clean_pool == 'process' else ThreadPoolExecutor
+        return pool_class(max_workers=self.clean_workers)
+    
+    def _map_columns(self, func, items, pool=None):
+        """Apply a per-column function serially or on the load's cleaning pool, keeping column order
+        
+        Workers are static methods, so a process pool pickles only the columns and never
+        the processor itself.
+        """
+        
+        if pool is None or len(items) <= 1:
+            return [func(item) for item in items]
+        return list(pool.map(func, items))
+    
+    def _sample_values(self, series):
+        """Evenly spaced non-null values from the column, up to inference_sample_rows"""
+        
+        step = max(1, len(series) // self.inference_sample_rows)
+        sample = series.iloc[::step].dropna()
+        
+        # Sparse columns: fall back to the first non-null values
+        if len(sample) < self.inference_sample_rows // 10 and step > 1:
+            sample = series.dropna().head(self.inference_sample_rows)
+        
+        return sample.head(self.inference_sample_rows)
     
-    def _convert_numeric_columns(self, df):
+    @staticmethod
+    def _infer_date_format(sample, name_hint):
+        """Find the datetime format that parses the sample, or None if it is not a date column"""
+        
+        values = sample.astype(str)
+        
+        # Candidate formats guessed from the first few values, month-first and day-first
+        candidates = []
+        with warnings.catch_warnings():
+            # A day-first guess on month-first values only warns; the sample check below decides
+            warnings.simplefilter('ignore', UserWarning)
+            for value in values.head(5):
+                for dayfirst in (False, True):
+                    date_format = guess_datetime_format(value, dayfirst=dayfirst)
+                    if date_format and date_format not in candidates:
+                        candidates.append(date_format)
+        
+        # Without a date-like name, require a date part and near-complete parsing
+        if not name_hint:
+            candidates = [fmt for fmt in candidates if '%Y' in fmt or '%y' in fmt]
+        threshold = 0.5 if name_hint else 0.9
+        
+        best_format, best_ratio = None, 0
+        for date_format in candidates:
+            ratio = pd.to_datetime(values, format=date_format, errors='coerce').notna().mean()
+            if ratio > best_ratio:
+                best_format, best_ratio = date_format, ratio
+        
+        if best_ratio > threshold:
+            return best_format
+        
+        # Date-like names with irregular values fall back to per-value parsing
+        if name_hint and pd.to_datetime(values, format='mixed', errors='coerce').notna().mean() > threshold:
+            return 'mixed'
+        
+        return None
+    
+    def _convert_numeric_columns(self, df, columns, pool=None):
         """Convert columns that should be numeric"""
         
+        converted = self._map_columns(self._confirm_numeric, [df[col] for col in columns], pool)
+        
+        # Assign in column order so the result matches the serial path
+        for col, numeric_series in zip(columns, converted):
+            if numeric_series is not None:
+                df[col] = numeric_series
+        
+        return df
+    
+    @staticmethod
+    def _confirm_numeric(series):
+        """Numeric version of the column, or None if it should keep its original type"""
+        
+        try:
+            numeric_series, non_null_count = CSVProcessor._coerce_numeric(series)
+            
+            # Confirm on the full column that more than 50% of non-null values converted
+            converted_count = numeric_series.notna().sum()
+            
+            if non_null_count > 0 and (converted_count / non_null_count) > 0.5:
+                return numeric_series
+                
+        except Exception:
+            pass  # Keep as original type
+        
+        return None
+    
+    def _normalize_arrow_dtypes(self, df):
+        """Hand Arrow-cleaned columns to the agents and charts as NumPy or string[pyarrow] columns"""
+        
         for col in df.columns:
-            # Skip if already numeric
-            if pd.api.types.is_numeric_dtype(df[col]):
+            dtype = df[col].dtype
+            if not isinstance(dtype, pd.ArrowDtype):
                 continue
             
-            # Try to convert to numeric
-            # First, clean common non-numeric characters
-            if df[col].dtype == 'object':
-                # Remove currency symbols, commas, whitespace
-                cleaned_series = df[col].astype(str).str.replace('[$,\s]', '', regex=True)
-                cleaned_series = cleaned_series.replace(['', 'nan', 'NaN', 'null'], np.nan)
-                
-                # Try conversion
-                try:
-                    numeric_series = pd.to_numeric(cleaned_series, errors='coerce')
-                    
-                    # If more than 50% of non-null values can be converted, assume it's numeric
-                    non_null_count = len(cleaned_series.dropna())
-                    converted_count = len(numeric_series.dropna())
-                    
-                    if non_null_count > 0 and (converted_count / non_null_count) > 0.5:
-                        df[col] = numeric_series
-                        
-                except Exception:
-                    pass  # Keep as original type
+            arrow_type = dtype.pyarrow_dtype
+            if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+                # Strings stay in compact Arrow buffers
+                df[col] = df[col].astype(pd.StringDtype('pyarrow'))
+            elif pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+                df[col] = df[col].astype('float64' if df[col].hasnans else dtype.numpy_dtype)
+            elif pa.types.is_boolean(arrow_type):
+                df[col] = df[col].astype('boolean' if df[col].hasnans else 'bool')
+            elif pa.types.is_date(arrow_type) or pa.types.is_timestamp(arrow_type):
+                df[col] = pd.to_datetime(df[col])
         
         return df
     
-    def _convert_date_columns(self, df):
-        """Convert columns that might be dates"""
+    def _convert_date_columns(self, df, date_formats, pool=None):
+        """Convert columns that are dates, using their inferred formats"""
         
-        date_keywords = ['date', 'time', 'created', 'updated', 'timestamp']
+        columns = list(date_formats)
+        converted = self._map_columns(self._to_datetime, [(df[col], date_formats[col]) for col in columns], pool)
         
-        for col in df.columns:
-            col_lower = col.lower()
-            
-            # Check if column name suggests it's a date
-            if any(keyword in col_lower for keyword in date_keywords):
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-                except Exception:
-                    pass  # Keep as original type
+        for col, date_series in zip(columns, converted):
+            if date_series is not None:
+                df[col] = date_series
         
         return df
     
-    def _handle_duplicate_columns(self, df):
+    @staticmethod
+    def _to_datetime(item):
+        """Parse one (series, format) pair, or None if it should keep its original type"""
+        
+        series, date_format = item
+        try:
+            return pd.to_datetime(series, format=date_format, errors='coerce')
+        except Exception:
+            return None  # Keep as original type
+    
+    def _handle_duplicate_columns(self, columns):
         """Handle duplicate column names"""
         
-        cols = pd.Series(df.columns)
+        cols = pd.Series(columns)
         
         # Find duplicates
         duplicated_mask = cols.duplicated()
@@ -173,8 +747,98 @@ class CSVProcessor:
             for i, idx in enumerate(dup_indices_list[1:], 1):
                 cols.iloc[idx] = f"{dup_col}_{i}"
         
-        df.columns = cols
-        return df
+        return cols.tolist()
+    
+    def optimize_dataframe(self, df):
+        """Shrink the dataframe in place of its int64/float64/object columns and report the bytes saved"""
+        
+        before_bytes = df.memory_usage(deep=True).sum()
+        
+        for col in df.columns:
+            series = df[col]
+            
+            if pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+                continue
+            elif pd.api.types.is_integer_dtype(series):
+                df[col] = pd.to_numeric(series, downcast='integer')
+            elif pd.api.types.is_float_dtype(series):
+                # Only downcast when every value survives the round trip exactly
+                downcast = series.astype('float32')
+                if ((downcast.astype('float64') == series) | series.isna()).all():
+                    df[col] = downcast
+            elif series.dtype == 'object' or pd.api.types.is_string_dtype(series):
+                df[col] = self._pack_text_column(series)
+        
+        after_bytes = df.memory_usage(deep=True).sum()
+        
+        return df, {
+            'before_bytes': int(before_bytes),
+            'after_bytes': int(after_bytes)
+        }
+    
+    def _pack_text_column(self, series):
+        """Turn true/false text into booleans and low-cardinality text into categories"""
+        
+        non_null = series.dropna()
+        if non_null.empty:
+            return series
+        
+        unique_values = non_null.unique()
+        
+        # Boolean-like columns
+        if len(unique_values) <= 2:
+            lowered = {str(value).strip().lower() for value in unique_values}
+            for true_value, false_value in (('true', 'false'), ('yes', 'no')):
+                if lowered <= {true_value, false_value}:
+                    packed = series.map(lambda value: None if pd.isna(value) else str(value).strip().lower() == true_value)
+                    return packed.astype('boolean' if series.isna().any() else 'bool')
+        
+        if len(unique_values) / len(series) < self.category_max_ratio:
+            return series.astype('category')
+        
+        return series
+    
+    def append_rows(self, df, new_rows):
+        """Concatenate freshly loaded rows onto an existing frame, keeping the frame's dtypes
+        
+        New values are cast to the existing column dtype whenever nothing is lost, and
+        categories are unioned, so the packed dtypes from optimize_dataframe survive an
+        append. Anything else falls back to pandas' usual upcasting.
+        """
+        
+        if list(new_rows.columns) != list(df.columns):
+            return pd.concat([df, new_rows], ignore_index=True)
+        
+        columns = {}
+        for col in df.columns:
+            old, new = df[col], self._align_column(new_rows[col], df[col].dtype)
+            if isinstance(old.dtype, pd.CategoricalDtype) and isinstance(new.dtype, pd.CategoricalDtype):
+                try:
+                    # Plain concat turns categories that differ into object
+                    columns[col] = union_categoricals([old, new])
+                    continue
+                except TypeError:
+                    pass
+            columns[col] = pd.concat([old, new], ignore_index=True)
+        
+        return pd.DataFrame(columns)
+    
+    def _align_column(self, series, dtype):
+        """Cast series to dtype if every value survives the cast, else return it unchanged"""
+        
+        if series.dtype == dtype:
+            return series
+        if isinstance(dtype, pd.CategoricalDtype):
+            return series.astype('category')  # Categories are unioned by the caller
+        
+        try:
+            converted = series.astype(dtype)
+        except (TypeError, ValueError):
+            return series
+        
+        if ((converted == series) | (converted.isna() & series.isna())).all():
+            return converted
+        return series
     
     def get_file_info(self, df):
         """Get basic information about the processed file"""
@@ -0,0 +1,82 @@
+import numpy as np
+
+def histogram_counts(values, groups, n_groups, max_bins=100):
+    """Bin edges shared by every group and a (n_groups, bins) array of counts
+    
+    values are floats (NaN is skipped), groups the group code of each value. The bin
+    width follows numpy's 'auto' rule on all values, capped at max_bins bins, and every
+    group is counted in one bincount pass.
+    """
+    
+    valid = np.isfinite(values)
+    values, groups = values[valid], groups[valid]
+    if not len(values):
+        return np.array([0.0, 1.0]), np.zeros((n_groups, 1), dtype=np.int64)
+    
+    edges = np.histogram_bin_edges(values, bins='auto')
+    if len(edges) - 1 > max_bins:
+        edges = np.linspace(edges[0], edges[-1], max_bins + 1)
+    bins = len(edges) - 1
+    
+    positions = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+    counts = np.bincount(groups * bins + positions, minlength=n_groups * bins)
+    return edges, counts.reshape(n_groups, bins)
+
+def box_stats(values, groups, n_groups, max_outliers=100):
+    """Tukey box statistics per group, computed from one ordering of all values
+    
+    Returns a dict of arrays (q1, median, q3, mean, lowerfence, upperfence, count) with
+    NaN for empty groups, and per group a list of at most max_outliers outliers spread
+    evenly over their range, so the most extreme ones are always included.
+    """
+    
+    valid = np.isfinite(values)
+    values, groups = values[valid], groups[valid]
+    
+    # Sorted by group, then value: a value sort followed by a stable (radix) sort of the small group codes
+    order = np.argsort(values)
+    order = order[np.argsort(groups[order].astype(np.min_scalar_type(max(n_groups - 1, 0))), kind='stable')]
+    values, groups = values[order], groups[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    present = counts > 0
+    
+    def quantile(q):
+        # Linear interpolation between the closest ranks, as numpy.percentile does
+        result = np.full(n_groups, np.nan)
+        rank = q * (counts[present] - 1)
+        low = np.floor(rank).astype(np.int64)
+        high = np.minimum(low + 1, counts[present] - 1)
+        start = offsets[present]
+        result[present] = values[start + low] + (rank - low) * (values[start + high] - values[start + low])
+        return result
+    
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    low_bound, high_bound = (q1 - 1.5 * iqr)[groups], (q3 + 1.5 * iqr)[groups]
+    inside = (values >= low_bound) & (values <= high_bound)
+    
+    # Whiskers end at the most extreme values inside the fences
+    lowerfence = np.full(n_groups, np.nan)
+    upperfence = np.full(n_groups, np.nan)
+    lowerfence[present] = np.minimum.reduceat(np.where(inside, values, np.inf), offsets[present])
+    upperfence[present] = np.maximum.reduceat(np.where(inside, values, -np.inf), offsets[present])
+    
+    sums = np.bincount(groups, weights=values, minlength=n_groups)
+    mean = np.where(present, sums / np.maximum(counts, 1), np.nan)
+    
+    outliers = [[] for _ in range(n_groups)]
+    outside = np.flatnonzero(~inside)
+    if len(outside):
+        outlier_groups = groups[outside]
+        bounds = np.searchsorted(outlier_groups, np.arange(n_groups + 1))
+        for group in np.flatnonzero(np.diff(bounds)):
+            positions = outside[bounds[group]:bounds[group + 1]]  # Already sorted by value
+            if len(positions) > max_outliers:
+                positions = positions[np.linspace(0, len(positions) - 1, max_outliers).astype(np.int64)]
+            outliers[group] = values[positions].tolist()
+    
+    return {
+        'q1': q1, 'median': median, 'q3': q3, 'mean': mean,
+        'lowerfence': lowerfence, 'upperfence': upperfence, 'count': counts
+    }, outliers
@@ -0,0 +1,123 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+class DomainCache:
+    """Persistent cache of business-domain results, keyed by a normalized schema fingerprint
+    
+    The domain prompt depends only on column names, column types and a few sample values,
+    so an upload with the same schema can reuse an earlier answer. With match_schema_only
+    the sample values are left out of the key and a feed with the same schema but different
+    data reuses the result too; otherwise the sample values must match as well.
+    """
+    
+    def __init__(self, cache_path=None, ttl_seconds=7 * 24 * 3600, max_entries=1000, match_schema_only=True):
+        self.cache_path = cache_path or os.path.join(tempfile.gettempdir(), 'domain_cache.json')
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries  # Least recently used entries are evicted above this count
+        self.match_schema_only = match_schema_only
+        
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = self._read()
+    
+    def make_key(self, column_names, column_analysis, sample_values=None):
+        """Fingerprint of the schema: normalized column names with their types, order-insensitive"""
+        
+        column_types = {col: kind for kind, cols in column_analysis.items() for col in cols}
+        schema = sorted((self._normalize(col), column_types.get(col, 'unknown')) for col in column_names)
+        
+        parts = {'schema': schema}
+        if not self.match_schema_only and sample_values:
+            parts['samples'] = sorted((self._normalize(col), values) for col, values in sample_values.items())
+        
+        payload = json.dumps(parts, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _normalize(name):
+        """'Order Date ', 'order-date' and 'ORDER_DATE' all become 'order_date'"""
+        return re.sub(r'[^0-9a-z]+', '_', str(name).strip().lower()).strip('_')
+    
+    def get(self, key):
+        """Cached domain result, or None on a miss or an expired entry
+        
+        Hits only touch last_used in memory; it reaches the file with the next put.
+        """
+        
+        with self._lock:
+            # Another process may have stored the key since this one read the file
+            if key not in self._entries:
+                self._merge(self._read())
+            
+            entry = self._entries.get(key)
+            now = time.time()
+            
+            if entry is None or now - entry['created'] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            
+            entry['last_used'] = now
+            self.hits += 1
+            return copy.deepcopy(entry['result'])
+    
+    def put(self, key, result):
+        """Store a domain result, evicting the least recently used entries above max_entries"""
+        
+        with self._lock:
+            now = time.time()
+            # Merge the file first so entries written by other processes are not overwritten
+            self._merge(self._read())
+            self._entries[key] = {'created': now, 'last_used': now, 'result': result}
+            
+            # Drop expired entries first, then the least recently used ones
+            self._entries = {k: e for k, e in self._entries.items() if now - e['created'] <= self.ttl_seconds}
+            if len(self._entries) > self.max_entries:
+                recent = sorted(self._entries.items(), key=lambda item: item[1]['last_used'], reverse=True)
+                self._entries = dict(recent[:self.max_entries])
+            
+            self._write()
+    
+    def stats(self):
+        """Hit/miss counters for this process"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries)
+        }
+    
+    def _merge(self, entries):
+        """Fold entries read from the file into memory, keeping the newer result and latest use"""
+        
+        for key, entry in entries.items():
+            current = self._entries.get(key)
+            if current is None or entry['created'] > current['created']:
+                if current is not None:
+                    entry['last_used'] = max(entry['last_used'], current['last_used'])
+                self._entries[key] = entry
+            else:
+                current['last_used'] = max(entry['last_used'], current['last_used'])
+    
+    def _read(self):
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+    
+    def _write(self):
+        """Write to a temporary name first so readers never see a partial file"""
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f, default=str)
+        os.replace(tmp_path, self.cache_path)
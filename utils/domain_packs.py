@@ -0,0 +1,167 @@
+import glob
+import json
+import os
+import re
+from collections import deque
+
+DEFAULT_PACK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'domain_packs')
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: one pass over the text finds every pattern in it
+    
+    Matching cost depends on the text length and the number of matches, not on the number
+    of patterns, so hundreds of domain packs cost the same per column name as three.
+    """
+    
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        
+        for pattern_id, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node].append(pattern_id)
+        
+        # Breadth-first: each node's failure link points at its longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+    
+    def find(self, text):
+        """Yield (start, pattern_id) for every occurrence of every pattern in text"""
+        
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for pattern_id in self._output[node]:
+                yield position - len(self.patterns[pattern_id]) + 1, pattern_id
+
+class DomainPackRegistry:
+    """Business-domain keyword packs loaded from JSON files, scored with one shared matcher
+    
+    Each pack file names a domain, weighted keywords for column names and for sampled
+    values, and the insights to suggest when it wins. Keywords of three characters or
+    fewer ('mrr', 'sku') only match whole words so they do not fire inside longer names.
+    """
+    
+    def __init__(self, pack_dir=None):
+        self.pack_dir = pack_dir or DEFAULT_PACK_DIR
+        self.packs = {}
+        for path in sorted(glob.glob(os.path.join(self.pack_dir, '*.json'))):
+            with open(path) as f:
+                pack = json.load(f)
+            self.packs[pack['domain']] = pack
+        
+        self._column_matcher, self._column_keywords = self._compile('column_keywords')
+        self._value_matcher, self._value_keywords = self._compile('value_keywords')
+    
+    def _compile(self, field):
+        """One automaton over every pack's keywords; each keyword maps to its (domain, weight) pairs"""
+        
+        keywords = {}
+        for domain, pack in self.packs.items():
+            for keyword, weight in pack.get(field, {}).items():
+                keywords.setdefault(self._normalize(keyword).strip('_'), []).append((domain, weight))
+        
+        patterns = list(keywords)
+        return AhoCorasick(patterns), [keywords[pattern] for pattern in patterns]
+    
+    @staticmethod
+    def _normalize(text, split_camel_case=False):
+        """'order-date' and 'Order Date' (and 'OrderDate' with split_camel_case) all become '_order_date_'"""
+        text = str(text)
+        if split_camel_case:
+            text = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', text)
+        return '_' + re.sub(r'[^0-9a-z]+', '_', text.lower()).strip('_') + '_'
+    
+    def _matches(self, matcher, keywords, text, split_camel_case=False):
+        """(keyword, domain, weight) for each keyword found in the normalized text"""
+        
+        text = self._normalize(text, split_camel_case)
+        for start, pattern_id in matcher.find(text):
+            keyword = matcher.patterns[pattern_id]
+            if len(keyword) <= 3:
+                end = start + len(keyword)
+                if text[start - 1] != '_' or text[end] != '_':
+                    continue
+            for domain, weight in keywords[pattern_id]:
+                yield keyword, domain, weight
+    
+    def score(self, column_names, sample_values=None):
+        """Weighted score per domain, with the keywords that produced it
+        
+        Each column counts once per domain, at the weight of its strongest keyword, so a
+        score is roughly the number of columns that look like the domain. Keywords found
+        in sampled values add their (smaller) weights once per domain.
+        """
+        
+        scores = {domain: 0.0 for domain in self.packs}
+        indicators = {domain: [] for domain in self.packs}
+        
+        for col in column_names:
+            best = {}
+            for keyword, domain, weight in self._matches(self._column_matcher, self._column_keywords, col, split_camel_case=True):
+                if weight > best.get(domain, (None, 0))[1]:
+                    best[domain] = (keyword, weight)
+            for domain, (keyword, weight) in best.items():
+                scores[domain] += weight
+                indicators[domain].append(f"Column '{col}' matches '{keyword}'")
+        
+        seen_values = set()
+        for values in (sample_values or {}).values():
+            for value in values:
+                for keyword, domain, weight in self._matches(self._value_matcher, self._value_keywords, value):
+                    if (domain, keyword) not in seen_values:
+                        seen_values.add((domain, keyword))
+                        scores[domain] += weight
+                        indicators[domain].append(f"Values mention '{keyword}'")
+        
+        return scores, indicators
+    
+    def detect(self, column_names, sample_values=None, min_confidence=0.2):
+        """Best matching domain in the same shape as the AI domain detection result"""
+        return self.rank(column_names, sample_values, min_confidence)[0]
+    
+    def rank(self, column_names, sample_values=None, min_confidence=0.2):
+        """detect() result plus how far ahead of the runner-up the winner is, relative to its score"""
+        
+        column_names = list(column_names)
+        scores, indicators = self.score(column_names, sample_values)
+        ranked = sorted(scores, key=lambda domain: scores[domain], reverse=True)
+        
+        best = ranked[0] if ranked else None
+        best_score = scores[best] if ranked else 0.0
+        runner_up = scores[ranked[1]] if len(ranked) > 1 else 0.0
+        confidence = min(best_score / len(column_names), 1.0) if column_names else 0.0
+        
+        if confidence <= min_confidence:
+            return {
+                'type': 'general',
+                'confidence': confidence,
+                'indicators': [f"Found {best_score:g} weighted column indicators"],
+                'suggested_insights': ["Revenue analysis", "Customer behavior patterns", "Performance metrics"]
+            }, 0.0
+        
+        return {
+            'type': best,
+            'confidence': confidence,
+            'indicators': indicators[best][:5],
+            'suggested_insights': self.packs[best].get('suggested_insights', [])
+        }, (best_score - runner_up) / best_score
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+def numeric_axis(values):
+    """Axis values as floats: datetimes as epoch nanoseconds, other non-numeric values by position"""
+    
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        stamps = values.dt.tz_localize(None) if values.dt.tz is not None else values
+        stamps = stamps.to_numpy(dtype='datetime64[ns]')
+        axis = stamps.astype(np.int64).astype(float)
+        axis[np.isnat(stamps)] = np.nan
+        return axis
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    return np.arange(len(values), dtype=float)
+
+def lttb(x, y, n_out):
+    """Positions of the points Largest-Triangle-Three-Buckets keeps to draw the line x, y with n_out points
+    
+    x must be sorted. The first and last points are always kept; every bucket in between
+    keeps the point forming the largest triangle with the point kept in the previous
+    bucket and the mean of the next one, which preserves peaks and troughs.
+    """
+    
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 buckets between the endpoints
+    starts, ends = edges[:-1], edges[1:]
+    
+    # Mean of every bucket, for the 'next bucket' corner of each triangle
+    x_sums = np.add.reduceat(x[1:n - 1], starts - 1)
+    y_sums = np.add.reduceat(y[1:n - 1], starts - 1)
+    sizes = ends - starts
+    x_means = np.append(x_sums / sizes, x[-1])
+    y_means = np.append(y_sums / sizes, y[-1])
+    
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        ax, ay = x[previous], y[previous]
+        cx, cy = x_means[bucket + 1], y_means[bucket + 1]
+        areas = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+def density_sample(x, y, n_out, grid=64, seed=0):
+    """Positions of about n_out scatter points that keep the shape of the point cloud
+    
+    Every occupied cell of a grid x grid binning keeps one point, so outliers and sparse
+    regions stay visible; the rest of the budget is a uniform random sample, which keeps
+    the relative density of crowded regions.
+    """
+    
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    
+    rng = np.random.default_rng(seed)
+    cells = _grid_cells(x, grid) * grid + _grid_cells(y, grid)
+    _, representatives = np.unique(cells, return_index=True)
+    
+    if len(representatives) >= n_out:
+        return np.sort(rng.choice(representatives, n_out, replace=False))
+    
+    rest = np.setdiff1d(np.arange(n), representatives, assume_unique=True)
+    extra = rng.choice(rest, n_out - len(representatives), replace=False)
+    return np.sort(np.concatenate([representatives, extra]))
+
+def _grid_cells(values, grid):
+    low, high = np.nanmin(values), np.nanmax(values)
+    if not high > low:
+        return np.zeros(len(values), dtype=np.int64)
+    cells = ((values - low) / (high - low) * grid).astype(np.int64)
+    return np.minimum(cells, grid - 1)
@@ -0,0 +1,85 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+class DuplicateTracker:
+    """Counts duplicate rows from 128-bit row hashes, incrementally as rows are appended
+    
+    Rows are added as two 64-bit hash lanes. Only rows whose hashes collide are candidates,
+    and only candidates are compared exactly, so the dataframe is never factorized as a
+    whole. The hashes are kept, so an appended batch is checked against everything seen
+    before without rehashing it.
+    """
+    
+    def __init__(self):
+        self.rows = 0
+        self.duplicate_rows = 0
+        
+        self._lane1 = np.empty(0, dtype=np.uint64)  # Row order
+        self._lane2 = np.empty(0, dtype=np.uint64)
+        self._sorted_lane1 = np.empty(0, dtype=np.uint64)
+        
+        self._pending_keys = []  # lane1 values of colliding groups that involve unconfirmed rows
+        self._confirmed_rows = 0
+    
+    def add(self, lane1, lane2):
+        """Add the hashes of rows appended to the end of the frame"""
+        
+        lane1 = np.asarray(lane1, dtype=np.uint64)
+        lane2 = np.asarray(lane2, dtype=np.uint64)
+        if not len(lane1):
+            return self
+        
+        batch = np.sort(lane1)
+        
+        # Collisions inside the batch
+        repeated = batch[1:][batch[1:] == batch[:-1]]
+        
+        # Collisions with earlier rows; sorted probes keep the binary searches cache friendly
+        if len(self._sorted_lane1):
+            positions = np.searchsorted(self._sorted_lane1, batch)
+            found = self._sorted_lane1[np.minimum(positions, len(self._sorted_lane1) - 1)] == batch
+            repeated = np.concatenate([repeated, batch[found]])
+        
+        if len(repeated):
+            self._pending_keys.append(np.unique(repeated))
+        
+        self._lane1 = np.concatenate([self._lane1, lane1])
+        self._lane2 = np.concatenate([self._lane2, lane2])
+        merged = np.concatenate([self._sorted_lane1, batch])
+        merged.sort(kind='stable')  # Two sorted runs: a merge, not a full sort
+        self._sorted_lane1 = merged
+        
+        self.rows += len(lane1)
+        return self
+    
+    def count(self, df):
+        """Number of rows equal to an earlier row, as df.duplicated().sum() reports it
+        
+        df is the frame the hashes were built from; rows whose hashes collide are
+        confirmed against it exactly.
+        """
+        
+        if self._pending_keys:
+            keys = np.unique(np.concatenate(self._pending_keys))
+            members = np.flatnonzero(pd.Series(self._lane1).isin(keys).to_numpy())
+            
+            # Both lanes must match before rows are worth comparing value by value
+            lanes = pd.DataFrame({'lane1': self._lane1[members], 'lane2': self._lane2[members]})
+            members = members[lanes.duplicated(keep=False).to_numpy()]
+            
+            if len(members):
+                duplicated = df.iloc[members].duplicated().to_numpy()
+                self.duplicate_rows += int((duplicated & (members >= self._confirmed_rows)).sum())
+            
+            self._pending_keys = []
+        
+        self._confirmed_rows = self.rows
+        return self.duplicate_rows
+    
+    def fingerprint(self):
+        """Digest of every row hash in row order: equal for equal frames, different after any change"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self._lane1.tobytes())
+        digest.update(self._lane2.tobytes())
+        return digest.hexdigest()
@@ -0,0 +1,278 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+import httpx
+from google import genai
+from google.genai import errors, types
+
+DEFAULT_MODEL = "gemini-2.5-pro"
+
+class GeminiBackend:
+    """Gemini API through a single genai.Client, whose HTTP connection pool is reused by every call"""
+    
+    RETRYABLE_CODES = (408, 429, 500, 502, 503, 504)
+    
+    def __init__(self, api_key):
+        self.client = genai.Client(api_key=api_key)
+    
+    def _config(self, json_output, timeout):
+        return types.GenerateContentConfig(
+            response_mime_type="application/json" if json_output else None,
+            http_options=types.HttpOptions(timeout=max(int(timeout * 1000), 1))
+        )
+    
+    @staticmethod
+    def _usage(response):
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return 0, 0
+        return usage.prompt_token_count or 0, usage.candidates_token_count or 0
+    
+    def generate(self, prompt, model, json_output, timeout):
+        """(text, prompt tokens, output tokens) for one request"""
+        response = self.client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=self._config(json_output, timeout)
+        )
+        return (response.text or ''), *self._usage(response)
+    
+    def generate_stream(self, prompt, model, timeout):
+        """Yield (text, prompt tokens, output tokens) per chunk; token counts are running totals"""
+        for chunk in self.client.models.generate_content_stream(
+            model=model,
+            contents=prompt,
+            config=self._config(False, timeout)
+        ):
+            yield (chunk.text or ''), *self._usage(chunk)
+    
+    def is_retryable(self, error):
+        if isinstance(error, errors.APIError):
+            return error.code in self.RETRYABLE_CODES
+        return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+class StubBackend:
+    """Offline stand-in for the model, for load tests and benchmarks without a network
+    
+    Text requests get a canned answer after a simulated latency; JSON requests get an
+    empty response, which every agent treats as 'no answer' and covers with its rule-based
+    fallback. responder(prompt, json_output) can supply other responses.
+    """
+    
+    def __init__(self, latency=0.05, jitter=0.02, failure_rate=0.0, responder=None, chunk_words=8, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate  # Share of calls that fail with a retryable error
+        self.responder = responder
+        self.chunk_words = chunk_words
+        self._random = random.Random(seed)
+    
+    def _respond(self, prompt, json_output, timeout):
+        delay = max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0)
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Stub response took longer than {timeout:.1f}s")
+        time.sleep(delay)
+        
+        if self._random.random() < self.failure_rate:
+            raise ConnectionError("Simulated stub backend failure")
+        
+        if self.responder is not None:
+            return self.responder(prompt, json_output)
+        if json_output:
+            return ''
+        return f"Stub answer to a {len(prompt)}-character prompt. No model was called."
+    
+    def generate(self, prompt, model, json_output, timeout):
+        text = self._respond(prompt, json_output, timeout)
+        return text, len(prompt) // 4, len(text) // 4
+    
+    def generate_stream(self, prompt, model, timeout):
+        text = self._respond(prompt, False, timeout)
+        words = text.split(' ')
+        for start in range(0, len(words), self.chunk_words):
+            piece = ' '.join(words[start:start + self.chunk_words])
+            if start + self.chunk_words < len(words):
+                piece += ' '
+            yield piece, len(prompt) // 4, len(text[:start]) // 4 + len(piece) // 4
+    
+    def is_retryable(self, error):
+        return isinstance(error, (TimeoutError, ConnectionError))
+
+class LLMGateway:
+    """Shared access to the language model for every agent
+    
+    Calls wait in a queue for one of max_concurrency slots, and each call has a deadline
+    that covers the queue wait, every attempt and the backoff between them. Retryable
+    errors (rate limits, server errors, dropped connections) are retried with full jitter
+    backoff while the deadline allows. Latency, queueing, retry and token counts are kept
+    in metrics().
+    """
+    
+    def __init__(self, backend, max_concurrency=4, timeout=60.0, max_retries=2, backoff=0.5):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._counters = {
+            'calls': 0, 'errors': 0, 'retries': 0, 'timeouts': 0, 'waiting': 0, 'in_flight': 0,
+            'queue_seconds': 0.0, 'prompt_tokens': 0, 'output_tokens': 0
+        }
+    
+    def _count(self, **changes):
+        with self._lock:
+            for name, change in changes.items():
+                self._counters[name] += change
+    
+    def _acquire(self, deadline):
+        """Wait for a free slot until the deadline"""
+        
+        started = time.monotonic()
+        self._count(waiting=1)
+        try:
+            acquired = self._slots.acquire(timeout=max(deadline - started, 0))
+        finally:
+            self._count(waiting=-1, queue_seconds=time.monotonic() - started)
+        if not acquired:
+            self._count(timeouts=1)
+            raise TimeoutError("Timed out waiting for a free LLM slot")
+        self._count(in_flight=1)
+    
+    def _release(self):
+        self._count(in_flight=-1)
+        self._slots.release()
+    
+    def _backoff(self, attempt, error, deadline):
+        """Sleep before the next attempt, or re-raise if the error is final or time is up"""
+        
+        if attempt >= self.max_retries or not self.backend.is_retryable(error):
+            raise error
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        if time.monotonic() + delay >= deadline:
+            raise error
+        self._count(retries=1)
+        time.sleep(delay)
+    
+    def generate(self, prompt, model=DEFAULT_MODEL, json_output=False, timeout=None):
+        """Text of the model's response ('' if it gave none); raises once retries or time run out"""
+        
+        deadline = time.monotonic() + (timeout or self.timeout)
+        self._count(calls=1)
+        self._acquire(deadline)
+        started = time.monotonic()
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise TimeoutError("LLM call deadline exceeded")
+                    text, prompt_tokens, output_tokens = self.backend.generate(prompt, model, json_output, remaining)
+                    break
+                except Exception as e:
+                    if isinstance(e, TimeoutError) and time.monotonic() >= deadline:
+                        self._count(timeouts=1, errors=1)
+                        raise
+                    try:
+                        self._backoff(attempt, e, deadline)
+                    except Exception:
+                        self._count(errors=1)
+                        raise
+                    attempt += 1
+        finally:
+            self._release()
+        
+        self._record(started, prompt_tokens, output_tokens)
+        return text
+    
+    def generate_stream(self, prompt, model=DEFAULT_MODEL, timeout=None):
+        """Yield the response text in pieces; only retried while nothing has been yielded yet"""
+        
+        deadline = time.monotonic() + (timeout or self.timeout)
+        self._count(calls=1)
+        self._acquire(deadline)
+        started = time.monotonic()
+        prompt_tokens = output_tokens = 0
+        try:
+            attempt = 0
+            while True:
+                received = False
+                try:
+                    for text, prompt_tokens, output_tokens in self.backend.generate_stream(
+                            prompt, model, max(deadline - time.monotonic(), 0.001)):
+                        if time.monotonic() > deadline:
+                            raise TimeoutError("LLM stream deadline exceeded")
+                        if text:
+                            received = True
+                            yield text
+                    break
+                except Exception as e:
+                    if received or (isinstance(e, TimeoutError) and time.monotonic() >= deadline):
+                        self._count(errors=1, timeouts=int(isinstance(e, TimeoutError)))
+                        raise
+                    try:
+                        self._backoff(attempt, e, deadline)
+                    except Exception:
+                        self._count(errors=1)
+                        raise
+                    attempt += 1
+        finally:
+            self._release()
+        
+        self._record(started, prompt_tokens, output_tokens)
+    
+    def _record(self, started, prompt_tokens, output_tokens):
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+            self._counters['prompt_tokens'] += prompt_tokens
+            self._counters['output_tokens'] += output_tokens
+    
+    def metrics(self):
+        """Counters since start, with latency percentiles over the last 1000 successful calls"""
+        
+        with self._lock:
+            metrics = dict(self._counters)
+            latencies = sorted(self._latencies)
+        
+        def percentile(q):
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)] if latencies else None
+        
+        metrics.update({
+            'backend': type(self.backend).__name__,
+            'max_concurrency': self.max_concurrency,
+            'latency_p50': percentile(0.5),
+            'latency_p95': percentile(0.95),
+            'latency_max': latencies[-1] if latencies else None
+        })
+        return metrics
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+def get_gateway(api_key):
+    """Process-wide gateway for an API key, configured from the environment
+    
+    LLM_BACKEND=stub swaps in the offline StubBackend (latency from LLM_STUB_LATENCY);
+    LLM_MAX_CONCURRENCY, LLM_TIMEOUT and LLM_MAX_RETRIES tune the gateway.
+    """
+    
+    with _gateways_lock:
+        if api_key not in _gateways:
+            if os.getenv('LLM_BACKEND', 'gemini') == 'stub':
+                backend = StubBackend(latency=float(os.getenv('LLM_STUB_LATENCY', '0.05')))
+            else:
+                backend = GeminiBackend(api_key)
+            _gateways[api_key] = LLMGateway(
+                backend,
+                max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '4')),
+                timeout=float(os.getenv('LLM_TIMEOUT', '60')),
+                max_retries=int(os.getenv('LLM_MAX_RETRIES', '2'))
+            )
+        return _gateways[api_key]
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import tempfile
+import pandas as pd
+import pyarrow as pa
+
+class ParseCache:
+    """Content-addressed on-disk cache of cleaned dataframes, stored as Arrow IPC files"""
+    
+    def __init__(self, cache_dir=None, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'csv_parse_cache')
+        self.max_bytes = max_bytes  # Least recently used files are evicted above this size
+        self.hash_block_bytes = 4 * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def make_key(self, source, settings):
+        """Hash the raw upload bytes together with the processor settings"""
+        
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(settings).encode())
+        
+        # Hash in blocks so the upload is never held in memory twice
+        source.seek(0)
+        while True:
+            block = source.read(self.hash_block_bytes)
+            if not block:
+                break
+            digest.update(block if isinstance(block, bytes) else block.encode())
+        source.seek(0)
+        
+        return digest.hexdigest()
+    
+    def get(self, key):
+        """Return (dataframe, load_info) for a cached upload, or None on a miss"""
+        
+        path = self._path(key)
+        try:
+            # Memory-map the file: no parsing, and columns are read straight from the page cache
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        
+        # Touch the file so eviction treats it as recently used
+        os.utime(path)
+        
+        metadata = table.schema.metadata or {}
+        load_info = json.loads(metadata.get(b'csv_load_info', b'{}'))
+        df = table.to_pandas(split_blocks=True)
+        
+        # Arrow round trips 'string' columns to Python storage; keep them in Arrow buffers
+        pandas_columns = json.loads(metadata.get(b'pandas', b'{}')).get('columns', [])
+        for column in pandas_columns:
+            if column.get('numpy_type') == 'string' and column['name'] in df.columns:
+                df[column['name']] = df[column['name']].astype(pd.StringDtype('pyarrow'))
+        
+        # Categories come back as object too; pandas does not record their dtype, so put() does
+        for name in json.loads(metadata.get(b'csv_string_categories', b'[]')):
+            if name in df.columns:
+                categories = df[name].cat.categories.astype(pd.StringDtype('pyarrow'))
+                df[name] = df[name].cat.set_categories(categories)
+        
+        return df, load_info
+    
+    def put(self, key, df, load_info):
+        """Store a cleaned dataframe, then evict old entries above the size cap"""
+        
+        table = pa.Table.from_pandas(df)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'csv_load_info'] = json.dumps(load_info).encode()
+        metadata[b'csv_string_categories'] = json.dumps([
+            col for col in df.columns
+            if isinstance(df[col].dtype, pd.CategoricalDtype) and isinstance(df[col].cat.categories.dtype, pd.StringDtype)
+        ]).encode()
+        table = table.replace_schema_metadata(metadata)
+        
+        # Write to a temporary name first so readers never see a partial file
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        
+        self._evict()
+    
+    def _path(self, key):
+        """Location of the cache file for a key"""
+        return os.path.join(self.cache_dir, f"{key}.arrow")
+    
+    def _evict(self):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.arrow'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
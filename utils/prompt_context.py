@@ -0,0 +1,88 @@
+import weakref
+from utils.query_engine import QueryEngine
+from utils.value_index import ValueIndex
+
+class PromptContext:
+    """Dataset summary for chat prompts, built once per dataset and analysis
+    
+    The statistics come from the column profile computed during analysis, so building
+    the context never scans the frame. It holds only a weak reference to the dataframe
+    and stops matching as soon as the data or its analysis is replaced.
+    """
+    
+    def __init__(self, df, analysis_results):
+        self._df = weakref.ref(df)
+        self.analysis_results = analysis_results
+        self.rows = len(df)
+        
+        # Content fingerprint for answer caching; None unless the analysis covers exactly this frame
+        same_rows = analysis_results.get('basic_stats', {}).get('rows') == self.rows
+        self.fingerprint = analysis_results.get('fingerprint') if same_rows else None
+        
+        self.domain = analysis_results.get('domain', {})
+        column_analysis = analysis_results.get('column_analysis', {})
+        self.columns = list(df.columns)
+        self.numeric_columns = column_analysis.get('numeric', [])
+        self.categorical_columns = column_analysis.get('categorical', [])
+        self.sample_rows = df.head(3).to_dict('records')
+        self.stats = self._numeric_stats(df, analysis_results) if self.numeric_columns else None
+        self._query_engine = None
+        
+        # Built up front, with the rest of the context, so lookups at question time are cheap
+        self.value_index = ValueIndex(df, self.categorical_columns + column_analysis.get('text', []), self.numeric_columns)
+        
+        self.text = f"""
+        Dataset Context:
+        - Business Domain: {self.domain.get('type', 'general')} (confidence: {self.domain.get('confidence', 0.5):.2f})
+        - Shape: {self.rows} rows × {len(self.columns)} columns
+        - Columns: {self.columns}
+        - Numeric Columns: {self.numeric_columns}
+        - Categorical Columns: {self.categorical_columns}
+        - Sample Data (first 3 rows): {self.sample_rows}
+        - Basic Statistics: {self.stats if self.stats else 'No numeric columns for statistics'}
+        """
+    
+    def _numeric_stats(self, df, analysis_results):
+        """describe()-style statistics per numeric column, read from the column profile"""
+        
+        profile = analysis_results.get('column_profile')
+        if not profile:
+            return df.describe().to_dict()
+        
+        stats = {}
+        for col in self.numeric_columns:
+            column = profile.get(col)
+            if column is None:
+                continue
+            quantiles = column.get('quantiles') or {}
+            stats[col] = {
+                'count': column['count'] - column['null_count'],
+                'mean': column['mean'],
+                'std': column['std'],
+                'min': column['min'],
+                '25%': quantiles.get('p25'),
+                '50%': quantiles.get('p50'),
+                '75%': quantiles.get('p75'),
+                'max': column['max']
+            }
+        return stats
+    
+    def retrieve(self, question, row_budget=20):
+        """Rows and aggregates for the values the question mentions, as prompt text (or None)"""
+        
+        df = self._df()
+        if df is None:
+            return None
+        return self.value_index.retrieve(df, question, row_budget)
+    
+    def query_engine(self):
+        """Local aggregation engine for the dataset, built on first use"""
+        
+        df = self._df()
+        if self._query_engine is None and df is not None:
+            self._query_engine = QueryEngine(df, self.analysis_results.get('column_analysis', {}))
+        return self._query_engine
+    
+    def matches(self, df, analysis_results):
+        """True while df and its analysis are the ones this context was built from"""
+        return self._df() is df and self.analysis_results is analysis_results and self.rows == len(df)
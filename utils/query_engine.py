@@ -0,0 +1,391 @@
+import re
+import pandas as pd
+
+AGGREGATE_WORDS = [
+    ('mean', ['average', 'avg', 'mean']),
+    ('median', ['median']),
+    ('nunique', ['distinct', 'unique', 'different']),
+    ('count', ['how many', 'number of', 'count of', 'count']),
+    ('sum', ['total', 'sum of', 'sum', 'overall']),
+    ('max', ['maximum', 'max', 'highest', 'largest', 'biggest', 'most']),
+    ('min', ['minimum', 'min', 'lowest', 'smallest', 'least', 'fewest'])
+]
+
+AGGREGATE_LABELS = {
+    'sum': 'total', 'mean': 'average', 'median': 'median', 'count': 'count',
+    'nunique': 'distinct count', 'max': 'maximum', 'min': 'minimum'
+}
+
+COMPARATORS = [
+    ('>=', ['at least', '>=']),
+    ('<=', ['at most', '<=']),
+    ('>', ['more than', 'greater than', 'over', 'above', '>']),
+    ('<', ['less than', 'under', 'below', '<']),
+    ('==', ['equal to', 'equals', '='])
+]
+
+PERIODS = {'day': 'D', 'week': 'W', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+
+AGGREGATE_VOCABULARY = {word for _, words in AGGREGATE_WORDS for phrase in words for word in phrase.split()}
+
+SUPERLATIVES = ['highest', 'most', 'largest', 'biggest', 'best', 'lowest', 'least', 'smallest', 'fewest', 'worst']
+
+# Intent an AggregationPlan cannot express; such questions go to the model
+UNSUPPORTED = re.compile(
+    r'\b(?:percent\w*|share|proportion|ratio|fraction|compare\w*|comparison|versus|vs|between|trend\w*|'
+    r'grow\w*|growth|increas\w*|decreas\w*|declin\w*|chang\w*|over time|correlat\w*|why|predict\w*|'
+    r'forecast\w*|expect\w*|each other|relationship|distribution)\b'
+)
+
+# Words that carry no meaning of their own in an aggregate question
+FILLER_WORDS = {
+    'a', 'an', 'the', 'of', 'in', 'on', 'at', 'for', 'to', 'from', 'with', 'and', 'or', 'where', 'which', 'what',
+    'whats', 's', 'is', 'are', 'was', 'were', 'be', 'has', 'have', 'had', 'do', 'does', 'did', 'our', 'my', 'we',
+    'us', 'me', 'i', 'show', 'give', 'tell', 'list', 'get', 'find', 'calculate', 'compute', 'please', 'there',
+    'it', 'its', 'value', 'amount', 'all', 'rows', 'records', 'entries', 'data', 'dataset', 'only', 'whole'
+}
+
+class AggregationPlan:
+    """Structured form of an aggregate question: filter, group-by, aggregate, sort, top-k"""
+    
+    def __init__(self, aggregate, measure=None, group_by=None, period=None, filters=None,
+                 time_range=None, sort=None, limit=None):
+        self.aggregate = aggregate  # sum, mean, median, count, nunique, max or min
+        self.measure = measure  # Column aggregated; None counts rows
+        self.group_by = group_by  # Column to group on
+        self.period = period  # Pandas period alias when group_by is a datetime column
+        self.filters = filters or []  # (column, operator, value); 'in' takes a list
+        self.time_range = time_range  # (column, start, end), end exclusive
+        self.sort = sort  # 'desc' or 'asc'
+        self.limit = limit
+    
+    def describe(self):
+        """Readable summary of the plan, e.g. 'total revenue by region where segment = retail, top 5'"""
+        
+        text = f"{AGGREGATE_LABELS[self.aggregate]} {self.measure}" if self.measure else "number of rows"
+        if self.group_by:
+            text += f" by {self.group_by}"
+            if self.period:
+                text += f" ({next(name for name, alias in PERIODS.items() if alias == self.period)})"
+        
+        conditions = [f"{col} {op} {value}" for col, op, value in self.filters]
+        if self.time_range:
+            col, start, end = self.time_range
+            conditions.append(f"{start:%Y-%m-%d} <= {col} < {end:%Y-%m-%d}")
+        if conditions:
+            text += " where " + " and ".join(conditions)
+        
+        if self.limit:
+            text += f", {'top' if self.sort != 'asc' else 'bottom'} {self.limit}"
+        return text
+
+class QueryEngine:
+    """Answers plain aggregate questions exactly, on the dataframe, without the model
+    
+    parse() turns a question into an AggregationPlan by matching column names, category
+    values, aggregate words, 'by'/'per' groupings, 'top N' and relative dates; it returns
+    None for anything it does not fully understand so the caller can fall back to the LLM.
+    The engine keeps no reference to the dataframe; execute() takes it.
+    """
+    
+    def __init__(self, df, column_analysis, max_filter_values=1000):
+        self.numeric = [col for col in column_analysis.get('numeric', []) if col in df.columns]
+        self.datetime = [col for col in column_analysis.get('datetime', []) if col in df.columns]
+        self.dimensions = [col for col in column_analysis.get('categorical', []) + column_analysis.get('boolean', [])
+                           if col in df.columns]
+        
+        # Columns with one distinct value per row ('order_id'): counting them is counting rows
+        self.row_keys = {
+            col for col in df.columns
+            if col not in self.dimensions and col not in self.datetime
+            and (col not in self.numeric or self._is_id(col))
+            and not df[col].hasnans and df[col].is_unique
+        }
+        
+        # Phrases that name a column, longest first so 'order value' wins over 'order'
+        phrases = {}
+        for col in df.columns:
+            for phrase in self._column_phrases(col):
+                phrases.setdefault(phrase, col)
+        self._phrases = sorted(phrases.items(), key=lambda item: len(item[0]), reverse=True)
+        
+        # Category values that can appear in questions as filters ('north', 'premium')
+        self._values = {}
+        for col in self.dimensions:
+            values = df[col].dropna().unique()
+            if len(values) > max_filter_values:
+                continue
+            for value in values:
+                phrase = self._normalize(value)
+                if phrase and phrase not in phrases and not phrase.isdigit():
+                    self._values.setdefault(phrase, (col, value))
+        
+        # Relative dates ('last month') are taken relative to the latest date in the data
+        self._latest = {col: df[col].max() for col in self.datetime}
+    
+    @staticmethod
+    def _normalize(text):
+        text = re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', str(text))
+        return re.sub(r'[^0-9a-z.]+', ' ', text.lower()).strip()
+    
+    def _is_id(self, col):
+        return self._normalize(col).endswith(' id')
+    
+    def _column_phrases(self, col):
+        """'order_value' -> 'order value(s)', 'category' -> 'categories', 'customer_id' -> 'customer(s)'"""
+        
+        phrase = self._normalize(col)
+        phrases = {phrase, phrase + 's', phrase.rstrip('s'), phrase.replace(' ', '')}
+        if phrase.endswith('y'):
+            phrases.add(phrase[:-1] + 'ies')
+        if phrase.endswith(' id') and len(phrase) > 3:
+            base = phrase[:-3]
+            phrases |= {base, base + 's'}
+        return {p for p in phrases if p}
+    
+    def _find(self, text, phrases):
+        """(start, end, target) of non-overlapping phrase matches in text, in text order"""
+        
+        taken, found = [], []
+        for phrase, target in phrases:
+            for match in re.finditer(rf'(?<![0-9a-z]){re.escape(phrase)}(?![0-9a-z])', text):
+                span = match.span()
+                if any(span[0] < end and start < span[1] for start, end in taken):
+                    continue
+                taken.append(span)
+                found.append((span[0], span[1], target))
+        return sorted(found)
+    
+    def parse(self, question):
+        """AggregationPlan for the question, or None if it is not a plain aggregation
+        
+        The parser is deliberately strict: the question needs an explicit aggregate word,
+        and any intent it cannot express (shares, comparisons, trends) or any word it does
+        not recognise sends the question to the model instead.
+        """
+        
+        text = self._normalize(question)
+        if UNSUPPORTED.search(text):
+            return None
+        
+        consumed = []  # Character spans of the question the plan accounts for
+        
+        columns = self._find(text, self._phrases)
+        mentioned = [col for _, _, col in columns]
+        consumed += [(start, end) for start, end, _ in columns]
+        
+        # Top/bottom N
+        sort, limit = None, None
+        top = re.search(r'\b(top|bottom|best|worst)\s+(\d+)\b', text)
+        if top:
+            sort = 'asc' if top.group(1) in ('bottom', 'worst') else 'desc'
+            limit = int(top.group(2))
+            consumed.append(top.span())
+        
+        # Grouping: 'by region', 'per month', 'for each store'
+        group_by, period = None, None
+        grouping = re.search(r'\b(?:by|per|for each|for every|across|in each)\s+(\w+)', text)
+        if grouping:
+            word = grouping.group(1)
+            if word in PERIODS or word.rstrip('ly') in PERIODS:
+                period = PERIODS.get(word, PERIODS.get(word.rstrip('ly')))
+                group_by = next((col for col in mentioned if col in self.datetime), None)
+                group_by = group_by or (self.datetime[0] if self.datetime else None)
+                consumed.append(grouping.span())
+            else:
+                # The first column after 'by', allowing aggregate words in between ('by total revenue')
+                after = [(start, col) for start, _, col in columns if start >= grouping.start(1)]
+                if after:
+                    gap = text[grouping.start(1):after[0][0]].split()
+                    if all(word in AGGREGATE_VOCABULARY for word in gap):
+                        group_by = after[0][1]
+                consumed.append((grouping.start(), grouping.start(1)))
+            if group_by is None:
+                return None  # 'per customer' without a customer column
+        
+        # 'top 5 products by revenue': the 'by' column is what to rank on, not what to group on
+        if group_by in self.numeric:
+            dimension = next((col for col in mentioned if col in self.dimensions), None)
+            if dimension is None:
+                return None
+            group_by = dimension
+        
+        # 'which region has the highest average revenue': rank groups, keep the first
+        superlative = re.search(rf"\b({'|'.join(SUPERLATIVES)})\b", text)
+        if group_by is None and superlative and re.match(r'(which|what)\b', text):
+            dimension = next((col for col in mentioned if col in self.dimensions), None)
+            if dimension is not None:
+                group_by, limit = dimension, limit or 1
+        ranking = group_by is not None and superlative is not None
+        if ranking:
+            consumed.append(superlative.span())
+            if sort is None:
+                sort = 'asc' if superlative.group(1) in ('lowest', 'least', 'smallest', 'fewest', 'worst') else 'desc'
+        
+        # The aggregate must be named; when groups are ranked, the superlative only orders them
+        aggregate = None
+        for name, words in AGGREGATE_WORDS:
+            for word in words:
+                if ranking and word in SUPERLATIVES:
+                    continue
+                match = re.search(rf'\b{re.escape(word)}\b', text)
+                if match:
+                    aggregate = aggregate or name
+                    consumed.append(match.span())
+        if aggregate is None:
+            return None
+        
+        filters, used, spans = self._parse_filters(text, columns)
+        consumed += spans
+        time_range, span = self._parse_time_range(text, mentioned)
+        if span:
+            consumed.append(span)
+        
+        # Every remaining word must be filler; anything else is meaning the plan would drop
+        for word in re.finditer(r'[0-9a-z.]+', text):
+            if any(start <= word.start() and word.end() <= end for start, end in consumed):
+                continue
+            if word.group() not in FILLER_WORDS:
+                return None
+        
+        # What to aggregate: the first mentioned column not used for grouping or filtering
+        candidates = [col for col in mentioned if col != group_by and col not in used and col not in self.datetime]
+        if aggregate == 'nunique':
+            measure = candidates[0] if candidates else None
+            if measure is None:
+                return None
+        elif aggregate == 'count':
+            # A numeric measure named alongside ('how many items') would be ignored
+            if any(col in self.numeric and not self._is_id(col) for col in candidates) or len(candidates) > 1:
+                return None
+            # 'how many orders' counts rows when order_id is unique per row; 'how many customers'
+            # or 'how many regions' counts the distinct values of a repeating column
+            measure = None
+            if candidates and candidates[0] not in self.row_keys:
+                aggregate, measure = 'nunique', candidates[0]
+        else:
+            measure = next((col for col in candidates if col in self.numeric), None)
+            if measure is None:
+                return None
+        
+        return AggregationPlan(aggregate, measure, group_by, period, filters, time_range,
+                               sort or ('desc' if group_by else None), limit)
+    
+    def _parse_filters(self, text, columns):
+        """Equality filters from category values, and numeric comparisons ('price over 100')
+        
+        Also returns the filtered columns and the spans of the question the filters cover.
+        """
+        
+        filters, used, spans = [], set(), []
+        
+        by_column = {}
+        for start, end, (col, value) in self._find(text, list(self._values.items())):
+            by_column.setdefault(col, []).append(value)
+            spans.append((start, end))
+        for col, values in by_column.items():
+            filters.append((col, '==', values[0]) if len(values) == 1 else (col, 'in', values))
+            used.add(col)
+        
+        for _, end, col in columns:
+            if col not in self.numeric:
+                continue
+            for op, words in COMPARATORS:
+                pattern = '|'.join(re.escape(word) for word in words)
+                match = re.match(rf'\s*(?:is\s+)?(?:{pattern})\s*(-?\d+(?:\.\d+)?)', text[end:])
+                if match:
+                    filters.append((col, op, float(match.group(1))))
+                    used.add(col)
+                    spans.append((end, end + match.end()))
+                    break
+        
+        return filters, used, spans
+    
+    def _parse_time_range(self, text, mentioned):
+        """(column, start, end) for 'last month', 'this year', 'last 7 days' or 'in 2023', and its span"""
+        
+        col = next((c for c in mentioned if c in self.datetime), None) or (self.datetime[0] if self.datetime else None)
+        if col is None or pd.isna(self._latest.get(col)):
+            return None, None
+        latest = pd.Timestamp(self._latest[col])
+        
+        match = re.search(r'\b(last|past|previous)\s+(\d+)\s+(day|week|month|year)s?\b', text)
+        if match:
+            n, unit = int(match.group(2)), match.group(3)
+            offset = pd.DateOffset(**{f'{unit}s': n})
+            return (col, latest - offset, latest + pd.Timedelta(1, 'ns')), match.span()
+        
+        match = re.search(r'\b(last|previous|this|current)\s+(week|month|quarter|year)\b', text)
+        if match:
+            current = latest.to_period(PERIODS[match.group(2)])
+            period = current - 1 if match.group(1) in ('last', 'previous') else current
+            return (col, period.start_time, (period + 1).start_time), match.span()
+        
+        match = re.search(r'\b(?:in|during|for)\s+((?:19|20)\d{2})\b', text)
+        if match:
+            year = pd.Period(match.group(1), 'Y')
+            return (col, year.start_time, (year + 1).start_time), match.span()
+        
+        return None, None
+    
+    def execute(self, df, plan):
+        """Run the plan vectorized; a scalar without group_by, else a dataframe of groups"""
+        
+        mask = pd.Series(True, index=df.index)
+        for col, op, value in plan.filters:
+            series = df[col]
+            if op == 'in':
+                mask &= series.isin(value)
+            elif op == '==':
+                mask &= series == value
+            elif op == '>':
+                mask &= series > value
+            elif op == '<':
+                mask &= series < value
+            elif op == '>=':
+                mask &= series >= value
+            elif op == '<=':
+                mask &= series <= value
+        if plan.time_range:
+            col, start, end = plan.time_range
+            mask &= (df[col] >= start) & (df[col] < end)
+        
+        rows = df[mask] if not mask.all() else df
+        
+        if plan.group_by is None:
+            if plan.measure is None:
+                return int(len(rows))
+            return rows[plan.measure].agg(plan.aggregate)
+        
+        keys = rows[plan.group_by]
+        if plan.period:
+            keys = keys.dt.to_period(plan.period)
+        grouped = rows.groupby(keys, observed=True, sort=plan.period is not None)
+        
+        if plan.measure is None:
+            result = grouped.size()
+        else:
+            result = grouped[plan.measure].agg(plan.aggregate)
+        
+        name = f"{plan.aggregate}_{plan.measure}" if plan.measure else 'count'
+        result = result.rename(name)
+        if plan.sort and not plan.period:
+            result = result.sort_values(ascending=plan.sort == 'asc')
+        if plan.limit:
+            result = result.head(plan.limit)
+        return result.reset_index()
+    
+    def format_result(self, plan, result, max_rows=20):
+        """Plain-text answer, used when the model is unavailable to phrase it"""
+        
+        if not isinstance(result, pd.DataFrame):
+            value = f"{result:,.2f}" if isinstance(result, float) else f"{result:,}"
+            return f"The {plan.describe()} is {value}."
+        
+        if result.empty:
+            return f"No rows match: {plan.describe()}."
+        
+        table = result.head(max_rows).to_string(index=False, float_format=lambda value: f"{value:,.2f}")
+        more = f"\n... and {len(result) - max_rows} more" if len(result) > max_rows else ""
+        description = plan.describe()
+        return f"{description[0].upper()}{description[1:]}:\n\n{table}{more}"
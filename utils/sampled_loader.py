@@ -0,0 +1,186 @@
+import copy
+import csv
+import io
+import mmap
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+class SampledLoad:
+    """Loads a CSV in a background thread and publishes a uniform row sample while it streams
+    
+    For a file on disk the preview is drawn from random byte offsets across the whole file
+    before the full load starts, so it covers every part of the file. Streamed rows also get
+    a uniform random key and the rows with the smallest keys are kept (bottom-k sampling),
+    which is the sample for file objects and becomes a sample of the whole file once
+    loading finishes.
+    """
+    
+    def __init__(self, processor, source, sample_rows=10_000, preview_seconds=3.0, remove_source=False, seed=0):
+        # Private copy so the background load does not race other uploads on load_info
+        self.processor = copy.copy(processor)
+        self.source = source
+        self.sample_rows = sample_rows
+        self.preview_seconds = preview_seconds  # Publish whatever has been sampled after this long
+        self.remove_source = remove_source  # Delete a spooled source file when loading ends
+        
+        self.rows_seen = 0
+        self.load_info = {}
+        self.error = None
+        
+        self._rng = np.random.default_rng(seed)
+        self._reservoir = None
+        self._keys = np.empty(0)
+        self._preview = None  # Sample spread over the whole file, until the full load is done
+        self._lock = threading.Lock()
+        self._sample_ready = threading.Event()
+        self._done = threading.Event()
+        self._result = None
+        self._started_at = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self):
+        """Start loading in the background"""
+        self._started_at = time.monotonic()
+        self._thread.start()
+        return self
+    
+    @property
+    def done(self):
+        """True once the full load has finished or failed"""
+        return self._done.is_set()
+    
+    def wait_for_sample(self, timeout=None):
+        """Block until a preview sample is available and return it"""
+        
+        self._sample_ready.wait(timeout)
+        if self.error is not None and self._reservoir is None:
+            raise self.error
+        return self.sample()
+    
+    def sample(self):
+        """Current sample of the rows read so far, in file order"""
+        
+        with self._lock:
+            if self._preview is not None and not self.done:
+                return self._preview
+            if self._reservoir is None:
+                return None
+            return self._reservoir.sort_index().reset_index(drop=True)
+    
+    def result(self, timeout=None):
+        """Wait for the full dataframe"""
+        
+        self._done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self._result
+    
+    def _run(self):
+        """Background thread: full streaming load, feeding every chunk to the sampler"""
+        try:
+            if isinstance(self.source, (str, os.PathLike)):
+                try:
+                    self._preview = self._sample_file()
+                except Exception as e:
+                    print(f"Spread preview sample failed, sampling the stream instead: {e}")
+                if self._preview is not None:
+                    self._sample_ready.set()
+            
+            df = self.processor.load_csv(self.source, on_chunk=self._on_chunk)
+            
+            # Cache hits return the full frame without streaming any chunks
+            if self._reservoir is None:
+                self._on_chunk(df, 0)
+            
+            self._result = df
+            self.load_info = self.processor.load_info
+        except Exception as e:
+            print(f"Background CSV load failed: {e}")
+            self.error = e
+        finally:
+            if self.remove_source:
+                os.remove(self.source)
+            self._done.set()
+            self._sample_ready.set()
+    
+    def _on_chunk(self, chunk, chunk_number):
+        """Merge a cleaned chunk into the bottom-k sample"""
+        
+        with self._lock:
+            # The stream was restarted (e.g. re-decoded as latin1): start sampling over
+            if chunk_number == 0:
+                self._reservoir, self._keys, self.rows_seen = None, np.empty(0), 0
+            
+            # Index rows by their position in the file so the sample can be put back in order
+            chunk = chunk.set_axis(pd.RangeIndex(self.rows_seen, self.rows_seen + len(chunk)))
+            keys = self._rng.random(len(chunk))
+            self.rows_seen += len(chunk)
+            
+            if self._reservoir is None:
+                candidates, candidate_keys = chunk, keys
+            else:
+                candidates = pd.concat([self._reservoir, chunk])
+                candidate_keys = np.concatenate([self._keys, keys])
+            
+            if len(candidates) > self.sample_rows:
+                keep = np.argpartition(candidate_keys, self.sample_rows)[:self.sample_rows]
+                candidates, candidate_keys = candidates.iloc[keep], candidate_keys[keep]
+            
+            self._reservoir, self._keys = candidates, candidate_keys
+        
+        if self.rows_seen >= self.sample_rows or time.monotonic() - self._started_at >= self.preview_seconds:
+            self._sample_ready.set()
+    
+    def _sample_file(self):
+        """Uniform sample of the file's rows read at random byte offsets, or None for small files
+        
+        A random offset lands in a line with probability proportional to its length, so each
+        drawn line is kept with probability (1st-percentile length) / its length to make every
+        row (nearly) equally likely. Lines that do not split into as many fields as the header
+        (pieces of quoted multi-line values) are skipped.
+        """
+        
+        with open(self.source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            header_end = view.find(b'\n') + 1
+            if header_end <= 0 or header_end >= len(view):
+                return None
+            
+            # Line starts and ends around random offsets, without duplicates
+            offsets = self._rng.integers(header_end, len(view), 4 * self.sample_rows)
+            spans = {}
+            for offset in offsets.tolist():
+                start = view.rfind(b'\n', header_end - 1, offset) + 1
+                end = view.find(b'\n', offset)
+                spans.setdefault(start, len(view) if end < 0 else end + 1)
+            if len(spans) < 2 * self.sample_rows:
+                return None  # Small file: the first streamed chunk covers it
+            
+            starts = np.fromiter(spans, dtype=np.int64, count=len(spans))
+            lengths = np.fromiter(spans.values(), dtype=np.int64, count=len(spans)) - starts
+            reference = np.percentile(lengths, 1)  # Not the minimum, so one stray short line cannot starve the sample
+            accepted = starts[self._rng.random(len(starts)) < reference / lengths]
+            accepted = np.sort(self._rng.permutation(accepted)[:self.sample_rows])
+            
+            header = view[:header_end]
+            lines = [view[start:spans[start]] for start in accepted.tolist()]
+        
+        dialect = self.processor.sniff_dialect(header + b''.join(lines[:100]))
+        encoding = dialect['encoding'] or 'latin1'
+        
+        def fields(line):
+            text = line.decode(encoding, errors='replace')
+            return len(next(csv.reader([text], delimiter=dialect['delimiter'], quotechar=dialect['quotechar']), []))
+        
+        width = fields(header)
+        data = header.rstrip(b'\r\n') + b'\n' + b''.join(
+            line if line.endswith(b'\n') else line + b'\n' for line in lines if fields(line) == width)
+        
+        # The preview is parsed and cleaned like the file itself, but never cached
+        processor = copy.copy(self.processor)
+        processor.cache = None
+        processor.streaming = False
+        return processor.load_csv(io.BytesIO(data))
+
@@ -0,0 +1,105 @@
+import re
+import numpy as np
+import pandas as pd
+
+class ValueIndex:
+    """Inverted index from categorical and text values to the rows that contain them
+    
+    Each indexed column is factorized once and its row positions sorted by code, so the
+    rows holding a value are one contiguous slice of a posting array. Questions are looked
+    up by their word n-grams, which costs a few dictionary probes however large the data
+    is. Per-value totals of the numeric columns are computed while building, so answering
+    never aggregates over the matching rows. The index keeps no reference to the dataframe;
+    retrieve() takes it.
+    """
+    
+    def __init__(self, df, columns, numeric_columns=None, max_values=200_000, max_words=6):
+        self.max_words = max_words
+        self.numeric_columns = [col for col in (numeric_columns or []) if col in df.columns]
+        self._postings = {}  # column -> (row positions sorted by code, code offsets, values)
+        self._totals = {}  # column -> {numeric column: (sum per code, non-null count per code)}
+        self._keys = {}  # normalized value -> [(column, code)]
+        
+        numeric = {col: df[col].to_numpy(dtype=float, na_value=np.nan) for col in self.numeric_columns}
+        
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes, values = pd.factorize(df[col], use_na_sentinel=True)
+            if len(values) > max_values:
+                continue
+            
+            # Shifted past the missing-value code, in the narrowest type so few-valued columns radix sort
+            codes = (codes + 1).astype(np.min_scalar_type(len(values)))
+            counts = np.bincount(codes, minlength=len(values) + 1)
+            order = np.argsort(codes, kind='stable')
+            offsets = np.concatenate([[0], np.cumsum(counts)])[1:]
+            self._postings[col] = (order, offsets, values)
+            
+            self._totals[col] = {}
+            for name, data in numeric.items():
+                present = ~np.isnan(data)
+                sums = np.bincount(codes[present], weights=data[present], minlength=len(values) + 1)
+                non_null = np.bincount(codes[present], minlength=len(values) + 1)
+                self._totals[col][name] = (sums[1:], non_null[1:])
+            
+            for code, value in enumerate(values):
+                key = self._normalize(value)
+                if len(key) < 2 or (key.isdigit() and len(key) < 4):
+                    continue  # Too short to tell apart from ordinary words and numbers
+                self._keys.setdefault(key, []).append((col, code))
+    
+    @staticmethod
+    def _normalize(text):
+        return ' '.join(re.findall(r'[0-9a-z]+', str(text).lower()))
+    
+    def lookup(self, question):
+        """(column, code, value, row positions) for each indexed value the question mentions
+        
+        Longer mentions win, so 'new york' is not also reported as 'york'.
+        """
+        
+        words = self._normalize(question).split()
+        matches, covered = [], set()
+        for size in range(min(self.max_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                span = set(range(start, start + size))
+                if span & covered:
+                    continue
+                hits = self._keys.get(' '.join(words[start:start + size]))
+                if not hits:
+                    continue
+                covered |= span
+                for col, code in hits:
+                    order, offsets, values = self._postings[col]
+                    matches.append((col, code, values[code], order[offsets[code]:offsets[code + 1]]))
+        return matches
+    
+    def retrieve(self, df, question, row_budget=20):
+        """Prompt text with the rows and per-value aggregates for values the question mentions
+        
+        The row budget is shared evenly between the mentioned values; aggregates always
+        cover every matching row, not only the rows shown.
+        """
+        
+        matches = self.lookup(question)
+        if not matches:
+            return None
+        
+        per_value = max(row_budget // len(matches), 1)
+        
+        sections = []
+        for col, code, value, rows in matches[:row_budget]:
+            section = f"- {col} = {value!r}: {len(rows):,} rows"
+            summary = []
+            for name, (sums, non_null) in self._totals[col].items():
+                if non_null[code]:
+                    summary.append(f"{name} total {sums[code]:,.2f} / avg {sums[code] / non_null[code]:,.2f}")
+            if summary:
+                section += f" ({', '.join(summary)})"
+            
+            sample = df.iloc[rows[:per_value]].to_dict('records')
+            section += f"\n  Matching rows ({len(sample)} of {len(rows):,}): {sample}"
+            sections.append(section)
+        
+        return "Data for values mentioned in the question:\n" + "\n".join(sections)